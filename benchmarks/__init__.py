@@ -0,0 +1,6 @@
+"""
+Бенчмарки горячих путей на синтетических историях уловов
+
+    python -m benchmarks
+    python -m benchmarks --sizes 1000 10000 --save-baseline
+"""
@@ -0,0 +1,82 @@
+"""
+Детерминированные синтетические истории уловов по настоящему справочнику
+"""
+import json
+import random
+import shutil
+from pathlib import Path
+from data_manager import DataManager
+from models import AppData, Fish, Species, TemporaryStorage
+
+# Размеры историй по умолчанию (число уловов)
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+# Справочник, из которого берутся виды и диапазоны веса
+FISH_DATA_PATH = Path(__file__).resolve().parent.parent / "assets" / "fish_data.json"
+
+# Время первого улова; следующие идут с шагом 1-600 с
+START_TIMESTAMP = 1_700_000_000
+
+# Доля уловов во временных хранилищах, остальные - в постоянном
+TEMPORARY_SHARE = 0.3
+TEMPORARY_STORAGES = 3
+
+
+def load_species(path: Path = FISH_DATA_PATH) -> list[dict]:
+    """Виды из справочника: название, редкость, наживка, цена и диапазон веса"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["рыбы"]
+
+
+def generate_app_data(size: int, seed: int = 0, species: list[dict] = None) -> AppData:
+    """История из size уловов; одинаковые size и seed дают одинаковые данные"""
+    species = species if species is not None else load_species()
+    rng = random.Random(f"{seed}:{size}")
+    kinds = [
+        (Species.intern(s["name"], s.get("best_bait", "Неизвестно"), s.get("price_guide", 50)),
+         s.get("rarity", "common"), s.get("weight_range", [0.1, 1.0]))
+        for s in species
+    ]
+    
+    # Лимиты с запасом: синтетическая история не упирается в заполненность
+    storages = [
+        TemporaryStorage(name=f"Хранилище {n + 1}", limit=float(size * 100), fishes=[])
+        for n in range(TEMPORARY_STORAGES)
+    ]
+    app_data = AppData(
+        temporary_storages=storages,
+        permanent_storage=[],
+        current_storage_name=storages[0].name,
+        permanent_storage_limit=float(size * 100)
+    )
+    
+    timestamp = START_TIMESTAMP
+    for number in range(size):
+        kind, rarity, (low, high) = kinds[rng.randrange(len(kinds))]
+        timestamp += rng.randint(1, 600)
+        if rng.random() < TEMPORARY_SHARE:
+            fishes, storage = storages[rng.randrange(len(storages))].fishes, "temporary"
+        else:
+            fishes, storage = app_data.permanent_storage, "permanent"
+        fishes.append(Fish(
+            id=f"{seed:04x}{number:012x}",
+            species=kind,
+            rarity=rarity,
+            weight=round(rng.uniform(low, high) * 1000, 1),  # Справочник в кг, улов в граммах
+            timestamp=timestamp,
+            storage=storage
+        ))
+    return app_data
+
+
+def prepare_data_dir(data_dir: Path, app_data: AppData, backend: str = "json") -> Path:
+    """Папка данных с настоящим справочником и сохраненной историей"""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copy(FISH_DATA_PATH, data_dir / "fish_data.json")
+    data_manager = DataManager(str(data_dir), backend=backend, write_behind=False)
+    try:
+        data_manager.save_app_data(app_data)
+    finally:
+        data_manager.close()
+    return data_dir
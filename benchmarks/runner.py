@@ -0,0 +1,307 @@
+"""
+Запуск бенчмарков и сравнение с сохраненными результатами
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+from data_manager import DataManager
+from stats_engine import StatsAccumulator
+from benchmarks.datasets import SIZES, generate_app_data, load_species, prepare_data_dir
+from benchmarks.stub_page import StubPage
+
+# Сохраненные результаты, с которыми сравнивается запуск
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# Замеры одного случая: не меньше MIN_SAMPLES и не дольше бюджета времени
+MIN_SAMPLES = 5
+DEFAULT_REPEAT = 30
+DEFAULT_BUDGET = 2.0  # Секунды на случай
+
+# Замедление лучшего замера больше этой доли считается регрессией. Лучший
+# замер устойчивее p50, но и он между двумя прогонами на одной машине
+# гуляет на десятки процентов (планировщик ОС, частота процессора, GC)
+DEFAULT_TOLERANCE = 0.5
+
+# Запросы поиска по справочнику: пользователь печатает по букве
+SEARCH_QUERIES = ("к", "ка", "кар", "карп", "", "верт", "вертушка", "щука", "")
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    """Перцентиль с линейной интерполяцией"""
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+@dataclass
+class Result:
+    """Замеры одного случая на одном размере истории"""
+    case: str
+    size: int
+    units: int  # Сколько единиц работы (уловов, запросов) в одном вызове
+    samples: list[float] = field(default_factory=list)  # Секунды
+    peak_bytes: int = 0
+    
+    def percentile(self, p: float) -> float:
+        return _percentile(sorted(self.samples), p)
+    
+    def to_dict(self) -> dict:
+        p50 = self.percentile(50)
+        return {
+            "samples": len(self.samples),
+            "min_ms": round(min(self.samples) * 1000, 3),
+            "p50_ms": round(p50 * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(max(self.samples) * 1000, 3),
+            "throughput": round(self.units / p50 if p50 > 0 else 0.0, 1),
+            "peak_mb": round(self.peak_bytes / 1e6, 3)
+        }
+
+
+class Context:
+    """Данные и представления для одного размера истории"""
+    
+    def __init__(self, data_dir: Path, size: int, backend: str):
+        self.size = size
+        self.data_manager = DataManager(str(data_dir), backend=backend, write_behind=False)
+        self.app_data = self.data_manager.load_app_data()
+        self.page = StubPage()
+        self.accumulator = StatsAccumulator()
+        self.accumulator.rebuild(self.app_data)
+        self._views = {}
+    
+    def view(self, name: str):
+        """Построенное представление (Flet импортируется только здесь)"""
+        view = self._views.get(name)
+        if view is None:
+            if name == "log":
+                from ui_components.log_view import LogView
+                view = LogView(self.page, self.data_manager, self.app_data, self.accumulator)
+            elif name == "stats":
+                from ui_components.stats_view import StatsView
+                view = StatsView(self.page, self.data_manager, self.app_data, self.accumulator)
+            else:
+                from ui_components.wiki_view import WikiView
+                view = WikiView(self.page, self.data_manager, self.app_data)
+            view.build()
+            self._views[name] = view
+        return view
+    
+    def close(self):
+        self.data_manager.close()
+
+
+def case_load_app_data(ctx: Context) -> tuple[Callable, int]:
+    """Чтение снимка (и журнала) с диска"""
+    return ctx.data_manager.load_app_data, ctx.size
+
+
+def case_save_app_data(ctx: Context) -> tuple[Callable, int]:
+    """Полная запись снимка"""
+    return lambda: ctx.data_manager.save_app_data(ctx.app_data), ctx.size
+
+
+def case_stats_rebuild(ctx: Context) -> tuple[Callable, int]:
+    """Статистика с нуля, как при запуске: итоги и таблица по видам"""
+    accumulator = StatsAccumulator()
+    
+    def run():
+        accumulator.rebuild(ctx.app_data)
+        accumulator.stats()
+    
+    return run, ctx.size
+
+
+def case_stats_calculate(ctx: Context) -> tuple[Callable, int]:
+    """StatsView._calculate_stats после изменения улова"""
+    view = ctx.view("stats")
+    
+    def run():
+        ctx.accumulator.version += 1  # Как после нового улова: кэш по видам устарел
+        view._calculate_stats()
+    
+    return run, ctx.size
+
+
+def case_log_refresh(ctx: Context) -> tuple[Callable, int]:
+    """Полное обновление журнала (refresh без события)"""
+    view = ctx.view("log")
+    return view.refresh, ctx.size
+
+
+def case_wiki_search(ctx: Context) -> tuple[Callable, int]:
+    """Поиск по справочнику; _on_search откладывает его таймером, замеряется сам поиск"""
+    view = ctx.view("wiki")
+    
+    def run():
+        for query in SEARCH_QUERIES:
+            view._run_search(query, view._search_seq)
+    
+    return run, len(SEARCH_QUERIES)
+
+
+CASES: dict[str, Callable[[Context], tuple[Callable, int]]] = {
+    "load_app_data": case_load_app_data,
+    "save_app_data": case_save_app_data,
+    "stats_rebuild": case_stats_rebuild,
+    "stats_calculate": case_stats_calculate,
+    "log_refresh": case_log_refresh,
+    "wiki_search": case_wiki_search,
+}
+
+
+def measure(case: str, ctx: Context, repeat: int, budget: float) -> Result:
+    """Замерить случай: прогрев, замеры времени, затем отдельный замер памяти"""
+    run, units = CASES[case](ctx)
+    result = Result(case, ctx.size, units)
+    run()  # Прогрев: ленивые индексы и кэши не попадают в замеры
+    
+    started = time.perf_counter()
+    while len(result.samples) < repeat:
+        t0 = time.perf_counter()
+        run()
+        result.samples.append(time.perf_counter() - t0)
+        if len(result.samples) >= MIN_SAMPLES and time.perf_counter() - started > budget:
+            break
+    
+    # tracemalloc замедляет выполнение, поэтому память меряется отдельным вызовом
+    tracemalloc.start()
+    try:
+        run()
+        result.peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(sizes: list[int], cases: list[str], backend: str = "json", seed: int = 0,
+                   repeat: int = DEFAULT_REPEAT, budget: float = DEFAULT_BUDGET,
+                   report: Optional[Callable[[Result], None]] = None) -> list[Result]:
+    """Прогнать случаи на историях заданных размеров"""
+    species = load_species()
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix=f"fish_bench_{size}_") as tmp:
+            data_dir = prepare_data_dir(Path(tmp), generate_app_data(size, seed, species), backend)
+            ctx = Context(data_dir, size, backend)
+            try:
+                for case in cases:
+                    result = measure(case, ctx, repeat, budget)
+                    results.append(result)
+                    if report is not None:
+                        report(result)
+            finally:
+                ctx.close()
+    return results
+
+
+def load_baseline(path: Path) -> dict:
+    """Сохраненные результаты {размер: {случай: показатели}}"""
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(path: Path, results: list[Result], backend: str):
+    """Сохранить результаты как новую базу (дополняя другие размеры)"""
+    baseline = load_baseline(path)
+    for result in results:
+        baseline.setdefault(str(result.size), {})[result.case] = result.to_dict()
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "backend": backend,
+        "results": baseline
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(result: Result, baseline: dict) -> Optional[float]:
+    """Отношение лучшего замера к базе (None - в базе нет такого замера)
+    
+    Сравнивается минимум, а не p50: случайные задержки его только
+    увеличивают, поэтому он меньше всего зависит от шума. В старых
+    базах без min_ms сравнивается p50.
+    """
+    base = baseline.get(str(result.size), {}).get(result.case)
+    if not base:
+        return None
+    if base.get("min_ms"):
+        return min(result.samples) * 1000 / base["min_ms"]
+    if base.get("p50_ms"):
+        return result.percentile(50) * 1000 / base["p50_ms"]
+    return None
+
+
+def format_row(result: Result, ratio: Optional[float], tolerance: float) -> str:
+    """Строка таблицы результатов"""
+    stats = result.to_dict()
+    if ratio is None:
+        versus = "-"
+    else:
+        versus = f"{ratio:.2f}x" + (" РЕГРЕССИЯ" if ratio > 1 + tolerance else "")
+    return (
+        f"{result.case:<16} {result.size:>9} {stats['samples']:>4} "
+        f"{stats['min_ms']:>10.2f} {stats['p50_ms']:>10.2f} {stats['p95_ms']:>10.2f} {stats['p99_ms']:>10.2f} "
+        f"{stats['throughput']:>12.0f} {stats['peak_mb']:>9.1f}  {versus}"
+    )
+
+
+HEADER = (
+    f"{'случай':<16} {'уловов':>9} {'n':>4} {'мин, мс':>10} {'p50, мс':>10} {'p95, мс':>10} {'p99, мс':>10} "
+    f"{'ед./с':>12} {'пик, МБ':>9}  к базе"
+)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(prog="benchmarks", description="Бенчмарки трекера рыбы")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Размеры историй")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="Случаи")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json", help="Хранилище данных")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора историй")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Наибольшее число замеров")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="Секунд на один случай")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Файл базовых результатов")
+    parser.add_argument("--save-baseline", action="store_true", help="Записать результаты как базу")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Допустимое замедление лучшего замера")
+    parser.add_argument("--check", action="store_true", help="Код возврата 1 при регрессии")
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Точка входа: python -m benchmarks"""
+    args = build_parser().parse_args(argv)
+    baseline = load_baseline(args.baseline)
+    regressions = []
+    
+    def report(result: Result):
+        ratio = compare(result, baseline)
+        if ratio is not None and ratio > 1 + args.tolerance:
+            regressions.append(result)
+        print(format_row(result, ratio, args.tolerance), flush=True)
+    
+    print(HEADER)
+    results = run_benchmarks(
+        args.sizes, args.cases, args.backend, args.seed, args.repeat, args.budget, report
+    )
+    
+    if args.save_baseline:
+        save_baseline(args.baseline, results, args.backend)
+        print(f"База сохранена: {args.baseline}")
+    if regressions:
+        print(f"Регрессий: {len(regressions)}", file=sys.stderr)
+        return 1 if args.check else 0
+    return 0
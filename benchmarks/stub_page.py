@@ -0,0 +1,20 @@
+"""
+Заглушка страницы Flet: представления строятся и обновляются без клиента
+"""
+
+
+class StubPage:
+    """Та часть ft.Page, которую используют представления
+    
+    page.update() только считается: время уходит на построение
+    контролов, а не на отправку изменений клиенту.
+    """
+    
+    def __init__(self):
+        self.overlay = []
+        self.dialog = None
+        self.snack_bar = None
+        self.update_calls = 0
+    
+    def update(self, *controls):
+        self.update_calls += 1
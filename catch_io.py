@@ -0,0 +1,201 @@
+"""
+Потоковый импорт и экспорт истории уловов в CSV и NDJSON
+"""
+import csv
+import json
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import chain
+from typing import Iterable, Iterator, TextIO
+from models import AppData, Fish, PERMANENT, RARITY_CODES, Species, _parse_timestamp
+from reference_catalog import ReferenceCatalog
+
+
+# Колонки экспорта; storage - временное хранилище, пустая строка - постоянное
+EXPORT_FIELDS = ("id", "name", "rarity", "weight", "timestamp", "price_guide", "best_bait", "storage")
+
+FORMATS = ("ndjson", "csv")
+
+
+class CatchRejected(ValueError):
+    """Улов не может быть добавлен (ошибка в данных или нет места)"""
+
+
+@dataclass
+class ImportResult:
+    """Итоги импорта"""
+    imported: int = 0
+    duplicates: int = 0  # Уже есть в истории или повторяются в файле
+    rejected: int = 0
+
+
+def read_records(stream: TextIO, input_format: str = "auto") -> Iterator[tuple[int, dict]]:
+    """Построчно читать уловы из NDJSON или CSV: (номер строки, запись)"""
+    lines = iter(stream)
+    if input_format == "auto":
+        # Формат определяется по первой непустой строке
+        first = ""
+        for first in lines:
+            if first.strip():
+                break
+        input_format = "ndjson" if first.lstrip().startswith("{") else "csv"
+        lines = chain([first], lines)
+    
+    if input_format == "ndjson":
+        for line_no, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as ex:
+                yield line_no, {"error": f"некорректный JSON: {ex}"}
+                continue
+            yield line_no, record if isinstance(record, dict) else {"error": "ожидался объект"}
+    else:
+        # Первая строка CSV - заголовок, например name,weight[,rarity][,storage]
+        for line_no, record in enumerate(csv.DictReader(lines), 2):
+            yield line_no, record
+
+
+def iter_catch_rows(app_data: AppData) -> Iterator[dict]:
+    """Строки экспорта по одной: сначала временные хранилища, затем постоянное"""
+    for storage in app_data.temporary_storages:
+        for fish in storage.fishes:
+            yield _catch_row(fish, storage.name)
+    for fish in app_data.permanent_storage:
+        yield _catch_row(fish, PERMANENT)
+
+
+def _catch_row(fish: Fish, storage_name: str) -> dict:
+    """Строка экспорта для одной рыбы"""
+    row = fish.to_dict()
+    row["storage"] = storage_name
+    return row
+
+
+def write_records(stream: TextIO, rows: Iterable[dict], output_format: str = "ndjson") -> int:
+    """Записать строки в NDJSON или CSV по мере получения; возвращает их число"""
+    count = 0
+    if output_format == "ndjson":
+        for row in rows:
+            stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    elif output_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=EXPORT_FIELDS, extrasaction="ignore", lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        raise ValueError(f"Неизвестный формат: {output_format}")
+    return count
+
+
+def check_record(record: dict, default_rarity: str = "common") -> tuple[str, float, str]:
+    """Проверить название, вес и редкость записи ввода: (название, вес, редкость)
+    
+    Общая проверка для импорта и добавления из командной строки.
+    """
+    if "error" in record:
+        raise CatchRejected(record["error"])
+    
+    name = (record.get("name") or "").strip()
+    if not name:
+        raise CatchRejected("не указано название")
+    
+    try:
+        weight = float(record.get("weight") or 0)
+    except (TypeError, ValueError):
+        raise CatchRejected(f"некорректный вес: {record.get('weight')!r}")
+    if not math.isfinite(weight):
+        # float() принимает "nan" и "inf" - такой вес испортил бы итоги хранилищ
+        raise CatchRejected(f"некорректный вес: {record.get('weight')!r}")
+    if weight <= 0:
+        raise CatchRejected("вес должен быть больше 0")
+    
+    rarity = (record.get("rarity") or default_rarity).strip()
+    if rarity not in RARITY_CODES:
+        raise CatchRejected(f"неизвестная редкость: {rarity}")
+    return name, weight, rarity
+
+
+def catch_from_record(record: dict, catalog: ReferenceCatalog, app_data: AppData,
+                      default_storage: str) -> tuple[str, Fish]:
+    """Рыба из строки импорта: (хранилище, рыба)
+    
+    Наживка и цена берутся из справочника, а для рыб, которых в нем нет
+    (журнал и командная строка их принимают), - из самой записи. Без id
+    создается новый, без времени - текущее.
+    """
+    name, weight, rarity = check_record(record)
+    fish_info = catalog.get(name)
+    if fish_info is None:
+        try:
+            price = record.get("price_guide")
+            price_guide = 50.0 if price in (None, "") else float(price)
+        except (TypeError, ValueError):
+            raise CatchRejected(f"некорректная цена: {record.get('price_guide')!r}")
+        if not math.isfinite(price_guide):
+            raise CatchRejected(f"некорректная цена: {record.get('price_guide')!r}")
+        fish_info = {
+            "name": name,
+            "best_bait": str(record.get("best_bait") or "").strip() or "Неизвестно",
+            "price_guide": price_guide
+        }
+    
+    # Нет колонки storage - хранилище по умолчанию, пустое значение - постоянное
+    storage_name = record.get("storage")
+    storage_name = default_storage if storage_name is None else str(storage_name).strip()
+    if storage_name != PERMANENT and app_data.get_storage(storage_name) is None:
+        raise CatchRejected(f"нет хранилища: {storage_name}")
+    
+    # В CSV время приходит строкой: число или ISO
+    value = record.get("timestamp")
+    try:
+        if value in (None, ""):
+            timestamp = int(datetime.now().timestamp())
+        elif isinstance(value, str) and value.strip().isdigit():
+            timestamp = int(value)
+        else:
+            timestamp = _parse_timestamp(value)
+    except (TypeError, ValueError):
+        raise CatchRejected(f"некорректное время: {value!r}")
+    
+    fish = Fish(
+        id=str(record.get("id") or "").strip() or uuid.uuid4().hex[:16],
+        species=Species.intern(fish_info["name"], fish_info.get("best_bait", "Неизвестно"),
+                               fish_info.get("price_guide", 50)),
+        rarity=rarity,
+        weight=weight,
+        timestamp=timestamp,
+        storage="permanent" if storage_name == PERMANENT else "temporary"
+    )
+    return storage_name, fish
+
+
+def existing_ids(app_data: AppData) -> set[str]:
+    """id всех рыб в истории (для отбрасывания повторов при импорте)"""
+    ids = {fish.id for storage in app_data.temporary_storages for fish in storage.fishes}
+    ids.update(fish.id for fish in app_data.permanent_storage)
+    return ids
+
+
+def import_changes(records: Iterable[tuple[int, dict]], catalog: ReferenceCatalog, app_data: AppData,
+                   default_storage: str, seen_ids: set[str], result: ImportResult,
+                   on_error=None) -> Iterator[tuple[str, dict]]:
+    """Изменения add_fish для проверенных строк без повторов id"""
+    for line_no, record in records:
+        try:
+            storage_name, fish = catch_from_record(record, catalog, app_data, default_storage)
+        except CatchRejected as ex:
+            result.rejected += 1
+            if on_error is not None:
+                on_error(line_no, str(ex))
+            continue
+        if fish.id in seen_ids:
+            result.duplicates += 1
+            continue
+        seen_ids.add(fish.id)
+        yield "add_fish", {"storage": storage_name, "fish": fish.to_dict()}
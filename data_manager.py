@@ -1,338 +1,287 @@
 """
 Менеджер данных для работы с JSON файлами
 """
+import copy
 import json
 import os
+import threading
+import time
+import tracemalloc
 from pathlib import Path
-from typing import Optional
-from models import AppData, Fish, TemporaryStorage
+from typing import Callable, Optional, TextIO
+from catch_io import ImportResult, existing_ids, import_changes, iter_catch_rows, read_records, write_records
+from events import EventBus
+from instrumentation import count, traced
+from models import AppData, ChangeEvent, Fish, TemporaryStorage
+from reference_catalog import ReferenceCatalog
+from storage_backends import JsonBackend, SqliteBackend, StorageBackend
+from write_behind import WriteBehindSaver
 
 
 class DataManager:
     """Класс для управления данными приложения"""
     
-    def __init__(self, data_dir: str = "assets"):
+    def __init__(self, data_dir: str = "assets", journal: bool = True, backend: str = "json",
+                 write_behind: bool = True):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         self.saved_data_path = self.data_dir / "saved_data.json"
         self.fish_data_path = self.data_dir / "fish_data.json"
+        self.catalog_cache_path = self.data_dir / "fish_data.cache"  # Разобранный справочник с индексами
+        self.journal_path = self.data_dir / "saved_data.journal"
+        self.db_path = self.data_dir / "saved_data.db"
         
+        # JSON (снимок + журнал) остается хранилищем по умолчанию;
+        # SQLite при первом запуске импортирует saved_data.json
+        json_backend = JsonBackend(self.saved_data_path, self.journal_path, journal)
+        if backend == "json":
+            self.backend: StorageBackend = json_backend
+        elif backend == "sqlite":
+            self.backend = SqliteBackend(self.db_path, legacy=json_backend)
+        else:
+            raise ValueError(f"Неизвестное хранилище: {backend}")
+        
+        self._catalog: Optional[ReferenceCatalog] = None
+        
+        # Изменения применяются в памяти сразу, а на диск пишутся фоновым
+        # потоком: изменения за короткое окно объединяются в одну запись.
+        # Блокировка данных не дает потоку записи сериализовать данные во
+        # время изменения; сам диск - под отдельной блокировкой, которую
+        # UI не ждет (порядок захвата: _lock, затем _io_lock).
+        self._lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._saver = WriteBehindSaver(self._write_pending, on_error=self._on_write_error) if write_behind else None
+        self.on_write_error: Optional[Callable[[Exception], None]] = None  # Например, уведомление в UI
+        
+        # Подписчики узнают об изменениях без перечитывания файла
+        self.events = EventBus()
+        self.version = 0  # Увеличивается при каждом изменении данных
+        self._disk_signature = None  # Отпечаток файлов после нашей последней записи
+        
+        # Показатели последних чтения и записи (для страницы диагностики)
+        self.last_load_seconds: Optional[float] = None
+        self.last_load_bytes: Optional[int] = None  # Память загруженных данных, если включен tracemalloc
+        self.last_load_catches = 0
+        self.last_save_seconds: Optional[float] = None
+        self.last_save_bytes: Optional[int] = None  # None - хранилище не сообщает объем записи
+        self.saves = 0
+        self.bytes_written = 0
+    
+    @property
+    def catalog(self) -> ReferenceCatalog:
+        """Общий справочник в памяти (перечитывается при изменении файла)"""
+        if self._catalog is None:
+            if not self.fish_data_path.exists():
+                self.load_fish_reference()
+            self._catalog = ReferenceCatalog(self.fish_data_path, self.catalog_cache_path)
+        return self._catalog
+    
     def load_fish_reference(self) -> dict:
         """Загрузить справочник рыб"""
         if not self.fish_data_path.exists():
-            # Создать справочник по умолчанию
-            default_fish_data = {
-                "рыбы": [
-                    # Высокоуровневые рыбы (уровни 7-9, запретные зоны) - rare/trophy
-                    {
-                        "name": "Сериола",
-                        "rarity": "trophy",
-                        "weight_range": [15.0, 40.0],
-                        "best_bait": "Вертушка-пуля",
-                        "price_guide": 8000
-                    },
-                    {
-                        "name": "Рустер",
-                        "rarity": "trophy",
-                        "weight_range": [12.0, 35.0],
-                        "best_bait": "Вертушка-пуля",
-                        "price_guide": 7500
-                    },
-                    {
-                        "name": "Марлин",
-                        "rarity": "trophy",
-                        "weight_range": [50.0, 200.0],
-                        "best_bait": "Воблер",
-                        "price_guide": 15000
-                    },
-                    {
-                        "name": "Тарпон",
-                        "rarity": "trophy",
-                        "weight_range": [20.0, 80.0],
-                        "best_bait": "Свимбейт",
-                        "price_guide": 10000
-                    },
-                    {
-                        "name": "Красный горбыль",
-                        "rarity": "trophy",
-                        "weight_range": [8.0, 25.0],
-                        "best_bait": "Безбородочная вертушка",
-                        "price_guide": 6000
-                    },
-                    {
-                        "name": "Барракуда",
-                        "rarity": "rare",
-                        "weight_range": [5.0, 20.0],
-                        "best_bait": "Тритон",
-                        "price_guide": 2500
-                    },
-                    {
-                        "name": "Тёмный горбыль",
-                        "rarity": "rare",
-                        "weight_range": [6.0, 18.0],
-                        "best_bait": "Топпер",
-                        "price_guide": 2000
-                    },
-                    {
-                        "name": "Круглый трахинот",
-                        "rarity": "rare",
-                        "weight_range": [4.0, 15.0],
-                        "best_bait": "Джитовая блесна",
-                        "price_guide": 1800
-                    },
-                    # Среднеуровневые рыбы (уровни 4-7) - uncommon/rare
-                    {
-                        "name": "Стальноголовый лосось",
-                        "rarity": "rare",
-                        "weight_range": [3.0, 12.0],
-                        "best_bait": "Тритон",
-                        "price_guide": 1500
-                    },
-                    {
-                        "name": "Прибрежный басс",
-                        "rarity": "rare",
-                        "weight_range": [2.0, 8.0],
-                        "best_bait": "Колеблющаяся блесна",
-                        "price_guide": 1200
-                    },
-                    {
-                        "name": "Альбула",
-                        "rarity": "rare",
-                        "weight_range": [1.5, 6.0],
-                        "best_bait": "Узкая блесна",
-                        "price_guide": 1000
-                    },
-                    {
-                        "name": "Снук обыкновенный",
-                        "rarity": "rare",
-                        "weight_range": [2.5, 10.0],
-                        "best_bait": "Средняя блесна",
-                        "price_guide": 1100
-                    },
-                    {
-                        "name": "Полосатый лаврак",
-                        "rarity": "rare",
-                        "weight_range": [2.0, 9.0],
-                        "best_bait": "Джерк",
-                        "price_guide": 1300
-                    },
-                    {
-                        "name": "Жерех",
-                        "rarity": "uncommon",
-                        "weight_range": [1.0, 5.0],
-                        "best_bait": "Колеблющаяся блесна / Креветки",
-                        "price_guide": 400
-                    },
-                    {
-                        "name": "Стерлядь",
-                        "rarity": "trophy",
-                        "weight_range": [1.5, 8.0],
-                        "best_bait": "Мясо лобстера",
-                        "price_guide": 5000
-                    },
-                    {
-                        "name": "Сазан",
-                        "rarity": "uncommon",
-                        "weight_range": [2.0, 12.0],
-                        "best_bait": "Пеллетсы",
-                        "price_guide": 300
-                    },
-                    {
-                        "name": "Голавль",
-                        "rarity": "uncommon",
-                        "weight_range": [0.5, 3.0],
-                        "best_bait": "Крэнк",
-                        "price_guide": 250
-                    },
-                    {
-                        "name": "Судак обыкновенный",
-                        "rarity": "uncommon",
-                        "weight_range": [1.0, 8.0],
-                        "best_bait": "Двухвостый твистер",
-                        "price_guide": 350
-                    },
-                    # Низкоуровневые рыбы (уровни 1-5) - common/uncommon
-                    {
-                        "name": "Сом обыкновенный",
-                        "rarity": "uncommon",
-                        "weight_range": [3.0, 20.0],
-                        "best_bait": "Двухвостый тамстер / Латушка",
-                        "price_guide": 200
-                    },
-                    {
-                        "name": "Зеркальный карп",
-                        "rarity": "uncommon",
-                        "weight_range": [2.0, 15.0],
-                        "best_bait": "Почки буйвола",
-                        "price_guide": 180
-                    },
-                    {
-                        "name": "Радужная форель",
-                        "rarity": "uncommon",
-                        "weight_range": [0.5, 4.0],
-                        "best_bait": "Спиннинг",
-                        "price_guide": 220
-                    },
-                    {
-                        "name": "Обыкновенная щука",
-                        "rarity": "uncommon",
-                        "weight_range": [1.0, 10.0],
-                        "best_bait": "Поппер-лягушка / Речной рак",
-                        "price_guide": 280
-                    },
-                    {
-                        "name": "Речной окунь",
-                        "rarity": "common",
-                        "weight_range": [0.3, 2.0],
-                        "best_bait": "Отвесная блесна / Живец",
-                        "price_guide": 80
-                    },
-                    {
-                        "name": "Серебряный карась",
-                        "rarity": "common",
-                        "weight_range": [0.2, 1.5],
-                        "best_bait": "Мотыль",
-                        "price_guide": 60
-                    },
-                    {
-                        "name": "Коричневый сом",
-                        "rarity": "common",
-                        "weight_range": [1.0, 8.0],
-                        "best_bait": "Сверчки",
-                        "price_guide": 100
-                    },
-                    {
-                        "name": "Плотва",
-                        "rarity": "common",
-                        "weight_range": [0.1, 0.8],
-                        "best_bait": "Тесто",
-                        "price_guide": 40
-                    },
-                    {
-                        "name": "Лещ",
-                        "rarity": "common",
-                        "weight_range": [0.5, 3.0],
-                        "best_bait": "Кукуруза",
-                        "price_guide": 70
-                    },
-                    {
-                        "name": "Краснопёрка",
-                        "rarity": "common",
-                        "weight_range": [0.2, 1.0],
-                        "best_bait": "Хлеб",
-                        "price_guide": 50
-                    },
-                    {
-                        "name": "Вобла",
-                        "rarity": "common",
-                        "weight_range": [0.1, 0.6],
-                        "best_bait": "Сверчки",
-                        "price_guide": 45
-                    },
-                    # Особые и трофейные рыбы
-                    {
-                        "name": "Древняя гинерия",
-                        "rarity": "trophy",
-                        "weight_range": [50.0, 200.0],
-                        "best_bait": "Особая приманка",
-                        "price_guide": 20000
-                    },
-                    {
-                        "name": "Токсичный окунь",
-                        "rarity": "trophy",
-                        "weight_range": [2.0, 10.0],
-                        "best_bait": "Защитная приманка",
-                        "price_guide": 12000
-                    },
-                    {
-                        "name": "Оранжевый карп",
-                        "rarity": "trophy",
-                        "weight_range": [5.0, 25.0],
-                        "best_bait": "Специальная приманка",
-                        "price_guide": 8000
-                    },
-                    {
-                        "name": "Карась",
-                        "rarity": "common",
-                        "weight_range": [0.2, 1.2],
-                        "best_bait": "Универсальная приманка",
-                        "price_guide": 55
-                    },
-                    {
-                        "name": "Красный солдат",
-                        "rarity": "trophy",
-                        "weight_range": [10.0, 50.0],
-                        "best_bait": "Трофейная приманка",
-                        "price_guide": 15000
-                    },
-                    {
-                        "name": "Золотая рыбка",
-                        "rarity": "trophy",
-                        "weight_range": [0.1, 0.5],
-                        "best_bait": "Золотая наживка",
-                        "price_guide": 25000
-                    },
-                    {
-                        "name": "Аквамарин",
-                        "rarity": "trophy",
-                        "weight_range": [8.0, 30.0],
-                        "best_bait": "Морская приманка",
-                        "price_guide": 10000
-                    },
-                    {
-                        "name": "Тунец",
-                        "rarity": "rare",
-                        "weight_range": [20.0, 100.0],
-                        "best_bait": "Сардина",
-                        "price_guide": 3000
-                    },
-                    {
-                        "name": "Камбала",
-                        "rarity": "uncommon",
-                        "weight_range": [0.5, 5.0],
-                        "best_bait": "Морская приманка",
-                        "price_guide": 400
-                    },
-                    {
-                        "name": "Форель",
-                        "rarity": "trophy",
-                        "weight_range": [1.0, 8.0],
-                        "best_bait": "Трофейная приманка",
-                        "price_guide": 5000
-                    }
-                ]
-            }
+            # Создать справочник по умолчанию (модуль импортируется только здесь)
+            from default_fish_data import DEFAULT_FISH_DATA
+            default_fish_data = copy.deepcopy(DEFAULT_FISH_DATA)
             self.save_fish_reference(default_fish_data)
             return default_fish_data
         
-        with open(self.fish_data_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return self.catalog.data
     
     def save_fish_reference(self, data: dict):
         """Сохранить справочник рыб"""
         with open(self.fish_data_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
     
+    @traced("data.load_app_data")
     def load_app_data(self) -> AppData:
         """Загрузить данные приложения"""
-        if not self.saved_data_path.exists():
-            app_data = AppData.create_default()
-            self.save_app_data(app_data)
+        self.flush()
+        with self._lock:
+            # Прирост памяти за время загрузки - примерный объем AppData
+            memory_before = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+            started = time.perf_counter()
+            with self._io_lock:
+                app_data = self.backend.load()
+            self.last_load_seconds = time.perf_counter() - started
+            if memory_before is not None:
+                self.last_load_bytes = max(0, tracemalloc.get_traced_memory()[0] - memory_before)
+            self.last_load_catches = app_data.count_catches()
+            self._disk_signature = self.backend.signature()
+            self.version += 1
             return app_data
+    
+    def reload_if_changed(self) -> Optional[AppData]:
+        """Перечитать данные, только если файл изменили извне
         
-        with open(self.saved_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return AppData.from_dict(data)
+        Пока наши изменения ждут записи или пишутся, файл заведомо
+        отличается от последнего отпечатка: проверка пропускается, а не
+        ждет фоновой записи (переключение вкладок не блокируется).
+        """
+        if self._saver is not None and not self._saver.idle:
+            return None
+        # Запись могла начаться после проверки - тогда ее тоже не ждать
+        if not self._io_lock.acquire(blocking=False):
+            return None
+        try:
+            if self.backend.signature() == self._disk_signature:
+                return None
+        finally:
+            self._io_lock.release()
+        app_data = self.load_app_data()
+        self.events.publish(ChangeEvent("reload", storages_changed=True, app_data=app_data))
+        return app_data
     
+    @traced("data.save_app_data")
     def save_app_data(self, app_data: AppData):
-        """Сохранить данные приложения"""
-        with open(self.saved_data_path, 'w', encoding='utf-8') as f:
-            json.dump(app_data.to_dict(), f, ensure_ascii=False, indent=2)
+        """Сохранить данные приложения целиком (в фоне, если включена отложенная запись)"""
+        if self._saver is None:
+            with self._lock:
+                started = time.perf_counter()
+                self._write(self.backend.prepare_save(app_data), started)
+        else:
+            self._saver.submit(("save", app_data, None, None, None))
+    
+    @traced("data.commit")
+    def commit(self, app_data: AppData, op: str, **data) -> ChangeEvent:
+        """Применить изменение, оповестить подписчиков и сохранить его"""
+        with self._lock:
+            event = app_data.apply_change(op, data)
+            # Номер и место в очереди - под той же блокировкой, что и применение
+            seq = self.backend.assign_seq()
+            self.version += 1
+            count("commit." + op)
+            if self._saver is None:
+                started = time.perf_counter()
+                self._write(self.backend.prepare_record_many(app_data, [(op, data)], seq), started)
+            else:
+                self._saver.submit(("change", app_data, op, data, seq))
+        self.events.publish(event)
+        return event
+    
+    @traced("data.commit_many")
+    def commit_many(self, app_data: AppData, changes: list[tuple[str, dict]]) -> list[ChangeEvent]:
+        """Применить пачку изменений (op, data) и сохранить ее одной записью
+        
+        Если изменение не применилось, предыдущие из пачки все равно
+        сохраняются и рассылаются, а исключение передается дальше.
+        """
+        events = []
+        try:
+            with self._lock:
+                try:
+                    for op, data in changes:
+                        events.append(app_data.apply_change(op, data))
+                finally:
+                    applied = changes[:len(events)]
+                    if applied:
+                        first_seq = self.backend.assign_seq(len(applied))
+                        self.version += 1
+                        if self._saver is None:
+                            started = time.perf_counter()
+                            self._write(self.backend.prepare_record_many(app_data, applied, first_seq), started)
+                        else:
+                            for seq, (op, data) in enumerate(applied, first_seq):
+                                self._saver.submit(("change", app_data, op, data, seq))
+        finally:
+            for event in events:
+                self.events.publish(event)
+        return events
+    
+    @traced("data.write_pending")
+    def _write_pending(self, batch: list):
+        """Записать накопленные изменения (выполняется в фоновом потоке)
+        
+        Данные сериализуются под блокировкой, а на диск пишутся уже без
+        нее: изменение из UI не ждет записи и fsync.
+        """
+        app_data = batch[-1][1]
+        started = time.perf_counter()
+        with self._lock:
+            if any(kind == "save" for kind, _, _, _, _ in batch):
+                # Полный снимок уже содержит все накопленные изменения
+                write = self.backend.prepare_save(app_data)
+            else:
+                # Номера изменений в очереди идут подряд (выданы под этой же блокировкой)
+                changes = [(op, data) for _, _, op, data, _ in batch]
+                write = self.backend.prepare_record_many(app_data, changes, batch[0][4])
+        self._write(write, started)
+    
+    def _write(self, write: Callable[[], None], started: float):
+        """Выполнить подготовленную запись, запомнив ее длительность и объем"""
+        with self._io_lock:
+            write()
+            self.last_save_seconds = time.perf_counter() - started
+            self.last_save_bytes = self.backend.last_write_bytes
+            self.saves += 1
+            if self.last_save_bytes:
+                self.bytes_written += self.last_save_bytes
+            self._disk_signature = self.backend.signature()
+    
+    def _on_write_error(self, error: Exception):
+        """Фоновая запись не удалась и будет повторена (поток записи)"""
+        if self.on_write_error is not None:
+            self.on_write_error(error)
+    
+    def flush(self):
+        """Дождаться записи всех изменений на диск"""
+        if self._saver is not None:
+            self._saver.flush()
+    
+    def query_catches(self, app_data: AppData, **filters) -> list[Fish]:
+        """Найти рыбы по хранилищу, редкости, весу и времени (см. StorageBackend)"""
+        self.flush()
+        return self.backend.query_catches(app_data, **filters)
+    
+    def export_catches(self, app_data: AppData, stream: TextIO, output_format: str = "ndjson") -> int:
+        """Записать всю историю уловов в поток (NDJSON или CSV); возвращает число строк
+        
+        Строки создаются по одной во время записи, копия истории не строится.
+        """
+        self.flush()
+        with self._lock:
+            return write_records(stream, iter_catch_rows(app_data), output_format)
+    
+    def import_catches(self, app_data: AppData, stream: TextIO, input_format: str = "auto",
+                       storage: Optional[str] = None, chunk_size: int = 1000,
+                       on_error: Optional[Callable[[int, str], None]] = None) -> ImportResult:
+        """Загрузить уловы из потока NDJSON/CSV пачками по chunk_size
+        
+        Файл читается построчно; в памяти держится одна пачка и множество
+        уже встреченных id. Рыбы не из справочника и некорректные строки
+        отклоняются (on_error(номер строки, причина)), повторы id
+        пропускаются. Лимиты хранилищ не проверяются.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size должен быть больше 0")
+        default_storage = app_data.current_storage_name if storage is None else storage
+        with self._lock:
+            seen_ids = existing_ids(app_data)
+        
+        result = ImportResult()
+        changes = import_changes(
+            read_records(stream, input_format), self.catalog, app_data,
+            default_storage, seen_ids, result, on_error
+        )
+        batch = []
+        for change in changes:
+            batch.append(change)
+            if len(batch) >= chunk_size:
+                self.commit_many(app_data, batch)
+                result.imported += len(batch)
+                batch = []
+        if batch:
+            self.commit_many(app_data, batch)
+            result.imported += len(batch)
+        return result
+    
+    def close(self):
+        """Записать отложенные изменения и закрыть хранилище данных"""
+        if self._saver is not None:
+            self._saver.close()
+            self._saver = None
+        self.backend.close()
     
+    @traced("data.get_fish_info")
     def get_fish_info(self, name: str) -> Optional[dict]:
         """Получить информацию о рыбе из справочника"""
-        fish_data = self.load_fish_reference()
-        for fish in fish_data.get("рыбы", []):
-            if fish["name"].lower() == name.lower():
-                return fish
-        return None
+        return self.catalog.get(name)
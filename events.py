@@ -0,0 +1,39 @@
+"""
+Шина событий об изменении данных приложения
+"""
+import threading
+import traceback
+from typing import Callable
+from models import ChangeEvent
+
+
+class EventBus:
+    """Рассылает ChangeEvent подписчикам в том же процессе"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: list[Callable[[ChangeEvent], None]] = []
+    
+    def subscribe(self, handler: Callable[[ChangeEvent], None]) -> Callable[[], None]:
+        """Подписаться на изменения; возвращает функцию отписки"""
+        with self._lock:
+            self._handlers.append(handler)
+        
+        def unsubscribe():
+            with self._lock:
+                if handler in self._handlers:
+                    self._handlers.remove(handler)
+        
+        return unsubscribe
+    
+    def publish(self, event: ChangeEvent):
+        """Оповестить всех подписчиков"""
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as ex:
+                # Ошибка одного подписчика не должна мешать остальным
+                print(f"ERROR в обработчике события {event.op}: {ex}")
+                traceback.print_exc()
@@ -0,0 +1,296 @@
+"""
+Командная строка трекера рыбы (без графического интерфейса)
+
+    python -m fish_tool add "Зеркальный карп" 1500 --rarity rare
+    python -m fish_tool add < catches.ndjson
+    python -m fish_tool list --rarity trophy
+    python -m fish_tool transfer
+    python -m fish_tool sell
+    python -m fish_tool stats
+    python -m fish_tool export --format csv -o history.csv
+    python -m fish_tool import history.csv
+"""
+import argparse
+import json
+import sys
+from typing import Iterator, Optional
+from catch_io import CatchRejected, check_record, FORMATS, read_records
+from data_manager import DataManager
+from models import AppData, Fish, PERMANENT, RARITY_CODES, RARITY_DISPLAY
+from stats_engine import compute_stats, PERCENTILES
+
+
+# Сколько изменений записывать на диск одной пачкой
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _build_fish(app_data: AppData, data_manager: DataManager, record: dict,
+                default_storage: str, default_rarity: str, ignore_limit: bool,
+                pending_kg: dict) -> tuple[str, Fish]:
+    """Создать рыбу из записи ввода; pending_kg - вес, уже добавленный в хранилища в этой пачке"""
+    name, weight, rarity = check_record(record, default_rarity)
+    
+    storage_name = (record.get("storage") or default_storage).strip()
+    storage = app_data.get_storage(storage_name)
+    if storage is None:
+        raise CatchRejected(f"нет хранилища: {storage_name}")
+    
+    # Проверка лимита, как в форме журнала (вес в граммах, лимит в кг)
+    weight_kg = weight / 1000
+    used_kg = storage.get_total_weight_kg() + pending_kg.get(storage_name, 0)
+    if not ignore_limit and used_kg + weight_kg > storage.limit:
+        raise CatchRejected(
+            f"недостаточно места в '{storage_name}': доступно {max(0, storage.limit - used_kg):.2f} кг"
+        )
+    pending_kg[storage_name] = pending_kg.get(storage_name, 0) + weight_kg
+    
+    fish_info = data_manager.get_fish_info(name) or {}
+    fish = Fish.create(
+        name=name,
+        rarity=rarity,
+        weight=weight,
+        price_guide=fish_info.get("price_guide", 50),
+        best_bait=fish_info.get("best_bait", "Неизвестно")
+    )
+    return storage_name, fish
+
+
+def _add_records(data_manager: DataManager, app_data: AppData, records: Iterator[tuple[int, dict]],
+                 args: argparse.Namespace) -> tuple[int, int]:
+    """Добавить уловы пачками; возвращает (добавлено, отклонено)"""
+    default_storage = args.storage or app_data.current_storage_name
+    added = rejected = 0
+    batch = []
+    pending_kg = {}
+    
+    def commit_batch():
+        nonlocal added
+        if batch:
+            data_manager.commit_many(app_data, batch)
+            added += len(batch)
+            batch.clear()
+            pending_kg.clear()
+    
+    for line_no, record in records:
+        try:
+            storage_name, fish = _build_fish(
+                app_data, data_manager, record, default_storage,
+                args.rarity, args.ignore_limit, pending_kg
+            )
+        except CatchRejected as ex:
+            rejected += 1
+            print(f"строка {line_no}: {ex}" if line_no else f"Ошибка: {ex}", file=sys.stderr)
+            continue
+        batch.append(("add_fish", {"storage": storage_name, "fish": fish.to_dict()}))
+        if len(batch) >= args.batch_size:
+            commit_batch()
+    commit_batch()
+    return added, rejected
+
+
+def cmd_add(data_manager: DataManager, app_data: AppData, args: argparse.Namespace) -> int:
+    """Добавить улов: один из аргументов или поток со стандартного ввода"""
+    if args.name is not None:
+        if args.weight is None:
+            print("Ошибка: укажите вес в граммах", file=sys.stderr)
+            return 2
+        records = iter([(0, {"name": args.name, "weight": args.weight})])  # 0 - не строка ввода
+    else:
+        records = read_records(sys.stdin, args.format)
+    
+    added, rejected = _add_records(data_manager, app_data, records, args)
+    print(f"Добавлено: {added}, отклонено: {rejected}")
+    return 1 if rejected else 0
+
+
+def cmd_list(data_manager: DataManager, app_data: AppData, args: argparse.Namespace) -> int:
+    """Вывести уловы по фильтрам"""
+    storage = PERMANENT if args.permanent else args.storage
+    fishes = data_manager.query_catches(
+        app_data, storage=storage, rarity=args.rarity, min_weight=args.min_weight
+    )
+    if args.limit is not None:
+        fishes = fishes[:args.limit]
+    
+    out = sys.stdout
+    if args.json:
+        for fish in fishes:
+            out.write(json.dumps(fish.to_dict(), ensure_ascii=False) + "\n")
+    else:
+        for fish in fishes:
+            out.write(f"{fish.id}  {fish.name:<24} {fish.rarity_display:<8} {fish.weight:>10.0f} г\n")
+        print(f"Всего: {len(fishes)} шт", file=sys.stderr)
+    return 0
+
+
+def cmd_transfer(data_manager: DataManager, app_data: AppData, args: argparse.Namespace) -> int:
+    """Перевести улов временного хранилища в постоянное"""
+    storage_name = args.storage or app_data.current_storage_name
+    storage = app_data.get_storage(storage_name)
+    if storage is None:
+        print(f"Ошибка: нет хранилища '{storage_name}'", file=sys.stderr)
+        return 2
+    if not storage.fishes:
+        print("Нет рыбы для переноса")
+        return 0
+    
+    # Проверка лимита постоянного хранилища, как в журнале
+    weight_kg = storage.get_total_weight_kg()
+    used_kg = app_data.get_permanent_total_weight_kg()
+    if not args.ignore_limit and used_kg + weight_kg > app_data.permanent_storage_limit:
+        print(
+            f"Ошибка: недостаточно места в постоянном хранилище: доступно "
+            f"{app_data.get_permanent_available_weight_kg():.2f} кг, переносится {weight_kg:.2f} кг",
+            file=sys.stderr
+        )
+        return 1
+    event = data_manager.commit(app_data, "transfer", storage=storage_name)
+    weight_kg = sum(fish.weight for fish in event.moved) / 1000
+    print(f"Переведено {len(event.moved)} рыб ({weight_kg:.2f} кг) в постоянное хранилище")
+    return 0
+
+
+def cmd_sell(data_manager: DataManager, app_data: AppData, args: argparse.Namespace) -> int:
+    """Продать весь улов постоянного хранилища"""
+    event = data_manager.commit(app_data, "sell")
+    value = sum(fish.price_guide for fish in event.removed)
+    print(f"Продано {len(event.removed)} рыб на {value:.0f}")
+    return 0
+
+
+def cmd_stats(data_manager: DataManager, app_data: AppData, args: argparse.Namespace) -> int:
+    """Вывести статистику улова"""
+    stats = compute_stats(app_data.to_catch_table())
+    if args.json:
+        stats = dict(stats, max_weight=stats["max_weight"].to_dict() if stats["max_weight"] else None)
+        print(json.dumps(stats, ensure_ascii=False, indent=2))
+        return 0
+    
+    print(f"Всего поймано: {stats['total']} шт • {stats['total_weight_kg']:.2f} кг")
+    print(f"Ориентировочная стоимость: {stats['total_value']:.0f}")
+    if stats["max_weight"]:
+        record = stats["max_weight"]
+        print(f"Рекордный вес: {record.name} - {record.weight:.0f} г")
+    for rarity in reversed(RARITY_CODES):
+        count = stats["rarity_distribution"].get(rarity)
+        if count:
+            print(f"  {RARITY_DISPLAY[rarity]}: {count} шт")
+    
+    if stats["species_stats"]:
+        header = ["Рыба", "Шт.", "Средний", "Мин", "Макс"] + [f"P{p}" for p in PERCENTILES] + ["Стоимость"]
+        print()
+        print("\t".join(header))
+        for item in stats["species_stats"]:
+            row = [item["name"], str(item["count"])]
+            row += [f"{item[key]:.0f}" for key in ("mean", "min", "max")]
+            row += [f"{item['percentiles'][p]:.0f}" for p in PERCENTILES]
+            row.append(f"{item['value']:.0f}")
+            print("\t".join(row))
+    return 0
+
+
+def cmd_export(data_manager: DataManager, app_data: AppData, args: argparse.Namespace) -> int:
+    """Выгрузить всю историю уловов"""
+    if args.output in (None, "-"):
+        count = data_manager.export_catches(app_data, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            count = data_manager.export_catches(app_data, f, args.format)
+    print(f"Выгружено: {count}", file=sys.stderr)
+    return 0
+
+
+def cmd_import(data_manager: DataManager, app_data: AppData, args: argparse.Namespace) -> int:
+    """Загрузить историю уловов из файла или стандартного ввода"""
+    storage = args.storage
+    if storage is not None and app_data.get_storage(storage) is None:
+        print(f"Ошибка: нет хранилища '{storage}'", file=sys.stderr)
+        return 2
+    
+    def report(line_no: int, message: str):
+        print(f"строка {line_no}: {message}", file=sys.stderr)
+    
+    if args.input in (None, "-"):
+        result = data_manager.import_catches(
+            app_data, sys.stdin, args.format, storage, args.batch_size, report
+        )
+    else:
+        with open(args.input, encoding="utf-8", newline="") as f:
+            result = data_manager.import_catches(
+                app_data, f, args.format, storage, args.batch_size, report
+            )
+    print(f"Загружено: {result.imported}, повторов: {result.duplicates}, отклонено: {result.rejected}")
+    return 1 if result.rejected else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(prog="fish_tool", description="Трекер выловленной рыбы без GUI")
+    parser.add_argument("--data-dir", default="assets", help="Папка с данными (по умолчанию assets)")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json", help="Хранилище данных")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    add = commands.add_parser("add", help="Добавить улов (без аргументов - NDJSON/CSV со stdin)")
+    add.add_argument("name", nargs="?", help="Название рыбы")
+    add.add_argument("weight", nargs="?", help="Вес в граммах")
+    add.add_argument("--rarity", choices=RARITY_CODES, default="common", help="Редкость по умолчанию")
+    add.add_argument("--storage", help="Временное хранилище (по умолчанию активное)")
+    add.add_argument("--format", choices=("auto", "ndjson", "csv"), default="auto", help="Формат stdin")
+    add.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Изменений в одной записи на диск")
+    add.add_argument("--ignore-limit", action="store_true", help="Не проверять лимит хранилища")
+    add.set_defaults(handler=cmd_add)
+    
+    list_ = commands.add_parser("list", help="Вывести уловы")
+    where = list_.add_mutually_exclusive_group()
+    where.add_argument("--storage", help="Только временное хранилище")
+    where.add_argument("--permanent", action="store_true", help="Только постоянное хранилище")
+    list_.add_argument("--rarity", choices=RARITY_CODES)
+    list_.add_argument("--min-weight", type=float, help="Минимальный вес в граммах")
+    list_.add_argument("--limit", type=int, help="Не больше N строк")
+    list_.add_argument("--json", action="store_true", help="NDJSON вместо таблицы")
+    list_.set_defaults(handler=cmd_list)
+    
+    transfer = commands.add_parser("transfer", help="Перевести улов в постоянное хранилище")
+    transfer.add_argument("--storage", help="Временное хранилище (по умолчанию активное)")
+    transfer.add_argument("--ignore-limit", action="store_true", help="Не проверять лимит постоянного хранилища")
+    transfer.set_defaults(handler=cmd_transfer)
+    
+    sell = commands.add_parser("sell", help="Продать весь улов постоянного хранилища")
+    sell.set_defaults(handler=cmd_sell)
+    
+    stats = commands.add_parser("stats", help="Статистика улова")
+    stats.add_argument("--json", action="store_true", help="Вывести в JSON")
+    stats.set_defaults(handler=cmd_stats)
+    
+    export = commands.add_parser("export", help="Выгрузить историю уловов в NDJSON/CSV")
+    export.add_argument("-o", "--output", help="Файл (по умолчанию stdout)")
+    export.add_argument("--format", choices=FORMATS, default="ndjson", help="Формат вывода")
+    export.set_defaults(handler=cmd_export)
+    
+    import_ = commands.add_parser("import", help="Загрузить историю уловов из NDJSON/CSV")
+    import_.add_argument("input", nargs="?", help="Файл (по умолчанию stdin)")
+    import_.add_argument("--format", choices=("auto",) + FORMATS, default="auto", help="Формат ввода")
+    import_.add_argument("--storage", help="Хранилище для строк без колонки storage (по умолчанию активное)")
+    import_.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Изменений в одной записи на диск")
+    import_.set_defaults(handler=cmd_import)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Точка входа командной строки"""
+    args = build_parser().parse_args(argv)
+    if getattr(args, "batch_size", 1) < 1:
+        print("Ошибка: --batch-size должен быть больше 0", file=sys.stderr)
+        return 2
+    
+    # Запись синхронная: при выходе все изменения уже на диске
+    data_manager = DataManager(args.data_dir, backend=args.backend, write_behind=False)
+    try:
+        app_data = data_manager.load_app_data()
+        return args.handler(data_manager, app_data, args)
+    finally:
+        data_manager.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Замеры горячих путей: интервалы, счетчики и скользящие гистограммы задержек
+
+Включаются переменной окружения FISH_TOOL_TRACE=1. Выключенные замеры
+почти ничего не стоят: traced() возвращает функцию без обертки, а span()
+- общий пустой контекст. Итоги пишутся в JSON вызовом dump() и при
+выходе из программы (файл FISH_TOOL_TRACE_FILE, по умолчанию
+fish_tool_trace.json).
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Optional
+
+ENV_VAR = "FISH_TOOL_TRACE"
+FILE_ENV_VAR = "FISH_TOOL_TRACE_FILE"
+DEFAULT_FILE = "fish_tool_trace.json"
+
+# Переменная окружения, включающая страницу диагностики
+DIAGNOSTICS_ENV_VAR = "FISH_TOOL_DIAGNOSTICS"
+
+# Сколько последних замеров каждого интервала входит в гистограмму
+WINDOW = 1024
+
+# Верхние границы корзин гистограммы, мс (последняя корзина - все, что больше)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def _env_enabled(name: str = ENV_VAR) -> bool:
+    """Включен ли флаг в окружении (по умолчанию - замеры)"""
+    return os.environ.get(name, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def diagnostics_enabled() -> bool:
+    """Включена ли страница диагностики (здесь, чтобы main не импортировал ее модуль)"""
+    return _env_enabled(DIAGNOSTICS_ENV_VAR)
+
+
+# Решение принимается один раз при импорте: от него зависит, оборачиваются ли функции
+enabled = _env_enabled()
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    """Перцентиль с линейной интерполяцией"""
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class SpanStats:
+    """Итоги одного интервала: за все время и по окну последних замеров"""
+    __slots__ = ("count", "total", "max", "last", "window")
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0  # Секунды
+        self.max = 0.0
+        self.last = 0.0
+        self.window = deque(maxlen=WINDOW)
+    
+    def add(self, seconds: float):
+        """Учесть замер"""
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.window.append(seconds)
+    
+    def histogram(self) -> dict[str, int]:
+        """Число замеров окна по корзинам: {"<=1 мс": n, ..., ">2500 мс": n}"""
+        counts = [0] * (len(BUCKETS_MS) + 1)
+        for seconds in self.window:
+            counts[bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+        labels = [f"<={bound:g} мс" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]:g} мс"]
+        return {label: n for label, n in zip(labels, counts) if n}
+    
+    def to_dict(self) -> dict:
+        window = sorted(self.window)
+        result = {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "last_ms": round(self.last * 1000, 3),
+            "window": len(window),
+            "histogram": self.histogram()
+        }
+        if window:
+            for p in (50, 95, 99):
+                result[f"p{p}_ms"] = round(_percentile(window, p) * 1000, 3)
+        return result
+
+
+class Registry:
+    """Хранилище замеров процесса (общее для всех потоков)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: dict[str, SpanStats] = {}
+        self.counters = Counter()
+    
+    def record(self, name: str, seconds: float):
+        """Учесть замер интервала"""
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(seconds)
+    
+    def count(self, name: str, n: int = 1):
+        """Увеличить счетчик"""
+        with self._lock:
+            self.counters[name] += n
+    
+    def snapshot(self) -> dict:
+        """Итоги всех интервалов и счетчиков"""
+        with self._lock:
+            return {
+                "spans": {name: stats.to_dict() for name, stats in sorted(self.spans.items())},
+                "counters": dict(sorted(self.counters.items()))
+            }
+    
+    def reset(self):
+        """Забыть все замеры"""
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+registry = Registry()
+
+
+class _Span:
+    """Контекст замера одного интервала"""
+    __slots__ = ("name", "start")
+    
+    def __init__(self, name: str):
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        registry.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_SPAN = nullcontext()
+
+
+def span(name: str):
+    """Замерить блок: with span("data.save"): ..."""
+    return _Span(name) if enabled else _NULL_SPAN
+
+
+def record(name: str, seconds: float):
+    """Учесть уже измеренный интервал"""
+    if enabled:
+        registry.record(name, seconds)
+
+
+def count(name: str, n: int = 1):
+    """Увеличить счетчик"""
+    if enabled:
+        registry.count(name, n)
+
+
+def traced(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Декоратор замера функции; при выключенных замерах функция не оборачивается"""
+    def decorator(func: Callable) -> Callable:
+        if not enabled:
+            return func
+        span_name = name or func.__qualname__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.record(span_name, time.perf_counter() - start)
+        
+        return wrapper
+    
+    return decorator
+
+
+class Phases:
+    """Длительности последовательных этапов (например, запуска приложения)
+    
+    Этапы замеряются всегда - это несколько вызовов perf_counter(); при
+    включенных замерах каждый этап еще и записывается интервалом prefix.этап.
+    """
+    
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._last = time.perf_counter()
+        self.phases: dict[str, float] = {}  # {этап: секунды}
+    
+    def mark(self, phase: str):
+        """Закончить этап, начавшийся с предыдущей отметки"""
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.add(phase, elapsed)
+    
+    def add(self, phase: str, seconds: float):
+        """Учесть этап, измеренный отдельно (например, импорт модулей)"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        record(f"{self.prefix}.{phase}", seconds)
+    
+    @property
+    def total(self) -> float:
+        """Секунд на все этапы"""
+        return sum(self.phases.values())
+    
+    def report(self) -> str:
+        """Строка отчета: "startup 120.5 мс (imports 80.1, load 30.2, ...)" """
+        parts = ", ".join(f"{phase} {seconds * 1000:.1f}" for phase, seconds in self.phases.items())
+        return f"{self.prefix} {self.total * 1000:.1f} мс ({parts})"
+
+
+def dump(path: Optional[str] = None) -> Path:
+    """Записать итоги в JSON-файл и вернуть его путь"""
+    path = Path(path or os.environ.get(FILE_ENV_VAR) or DEFAULT_FILE)
+    data = registry.snapshot()
+    data["written_at"] = int(time.time())
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _dump_at_exit():
+    """Записать итоги при выходе, если что-то было замерено"""
+    if registry.spans or registry.counters:
+        try:
+            dump()
+        except OSError as ex:
+            print(f"ERROR при записи замеров: {ex}")
+
+
+if enabled:
+    atexit.register(_dump_at_exit)
@@ -1,16 +1,30 @@
 """
 Главный файл приложения трекера выловленной рыбы
 """
+import time
+
+# Импорт Flet и модулей приложения входит в отчет о запуске
+_IMPORT_STARTED = time.perf_counter()
+
+import atexit
+import os
+import tracemalloc
+from typing import Optional
 import flet as ft
+import instrumentation
 from data_manager import DataManager
-from models import AppData
-from ui_components.log_view import LogView
-from ui_components.wiki_view import WikiView
-from ui_components.stats_view import StatsView
+from stats_engine import StatsAccumulator
+from ui_components.update_scheduler import UpdateScheduler
+from profiling import profiler
+
+# Модули представлений импортируются при их первом показе (см. main)
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 
 def main(page: ft.Page):
     """Главная функция приложения"""
+    startup = instrumentation.Phases("startup")
+    startup.add("imports", _IMPORT_SECONDS)
     
     # Настройка страницы
     page.title = "Fishing Log - Трекер выловленной рыбы"
@@ -37,77 +51,154 @@ def main(page: ft.Page):
     page.theme.page_transitions.macos = ft.PageTransitionTheme.CUPERTINO
     page.theme.page_transitions.linux = ft.PageTransitionTheme.CUPERTINO
     
-    # Инициализация менеджера данных
-    data_manager = DataManager()
+    # Все обновления страницы за одно действие пользователя - одним page.update()
+    updates = UpdateScheduler.for_page(page)
+    
+    # Страница диагностики (FISH_TOOL_DIAGNOSTICS=1); tracemalloc запускается
+    # до загрузки данных, чтобы учесть их память
+    diagnostics = instrumentation.diagnostics_enabled()
+    if diagnostics and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    
+    # Инициализация менеджера данных (FISH_TOOL_BACKEND=sqlite для SQLite)
+    data_manager = DataManager(backend=os.environ.get("FISH_TOOL_BACKEND", "json"))
     app_data = data_manager.load_app_data()
+    startup.mark("load")
+    
+    # Статистика считается один раз - при первом обращении, а не до первого
+    # кадра, - и дальше обновляется по событиям
+    stats_accumulator = StatsAccumulator()
+    stats_accumulator.defer(app_data)
+    data_manager.events.subscribe(stats_accumulator.apply)
+    startup.mark("stats")
+    
+    # Представления создаются при первом показе: модуль представления
+    # импортируется, а справочник разбирается, только когда они нужны
+    def create_log_view():
+        from ui_components.log_view import LogView
+        return LogView(page, data_manager, app_data, stats_accumulator)
+    
+    def create_wiki_view():
+        from ui_components.wiki_view import WikiView
+        return WikiView(page, data_manager, app_data)
+    
+    def create_stats_view():
+        from ui_components.stats_view import StatsView
+        return StatsView(page, data_manager, app_data, stats_accumulator)
     
-    # Создание представлений
-    log_view = LogView(page, data_manager, app_data, on_data_changed=lambda: refresh_all())
-    wiki_view = WikiView(page, data_manager, app_data)
-    stats_view = StatsView(page, data_manager, app_data)
+    def create_diagnostics_view():
+        from ui_components.diagnostics_view import DiagnosticsView
+        return DiagnosticsView(page, data_manager, app_data, startup)
+    
+    view_factories = [create_log_view, create_wiki_view, create_stats_view]
+    if diagnostics:
+        view_factories.append(create_diagnostics_view)
     
     # Контейнер для контента
     content_container = ft.Ref[ft.Container]()
     
+    # Деревья контролов строятся один раз и переиспользуются при переключении
+    views = {}  # {индекс: представление}
+    built_views = {}  # {индекс: построенный контейнер}
+    shown_versions = {}  # {индекс: версия данных на момент последнего обновления}
+    current_index = None
+    
+    def data_version(index: int) -> int:
+        """Версия данных, от которых зависит представление"""
+        if index == 1:
+            # Справочник зависит только от fish_data.json
+            return data_manager.catalog.check_version()
+        if index == 3:
+            # Диагностика меняется после каждого действия
+            return updates.actions
+        return data_manager.version
+    
+    def set_view_visible(index: Optional[int], visible: bool):
+        """Сообщить представлению, что его показали или скрыли (если ему это нужно)"""
+        set_visible = getattr(views.get(index), "set_visible", None)
+        if set_visible is not None:
+            set_visible(visible)
+    
+    def show_view(index: int):
+        """Показать представление, обновив его только при изменении данных"""
+        nonlocal current_index
+        view = views.get(index)
+        if view is None:
+            view = views[index] = view_factories[index]()
+        if index not in built_views:
+            built_views[index] = view.build()
+            shown_versions.pop(index, None)
+        content_container.current.content = built_views[index]
+        if current_index != index:
+            set_view_visible(current_index, False)
+            set_view_visible(index, True)
+        current_index = index
+        
+        version = data_version(index)
+        if shown_versions.get(index) != version:
+            view.refresh()
+            shown_versions[index] = version
+    
+    @updates.batched
     def on_navigation_change(e):
         """Обработчик изменения навигации"""
-        selected_index = e.control.selected_index
+        # Файл данных могли изменить извне (например, другой копией приложения)
+        data_manager.reload_if_changed()
         
-        if selected_index == 0:
-            # Страница журнала
-            content_container.current.content = log_view.build()
-            log_view.refresh()
-        elif selected_index == 1:
-            # Страница справочника
-            content_container.current.content = wiki_view.build()
-            wiki_view.refresh()
-        elif selected_index == 2:
-            # Страница статистики
-            content_container.current.content = stats_view.build()
-            stats_view.refresh()
-        
-        page.update()
+        show_view(e.control.selected_index)
+        updates.request_update("navigation")
     
-    def refresh_all():
-        """Обновить все представления"""
-        # Перезагрузить данные
+    def on_data_changed(event):
+        """Обновить текущее представление после изменения данных"""
         nonlocal app_data
-        app_data = data_manager.load_app_data()
-        
-        # Обновить представления
-        log_view.app_data = app_data
-        wiki_view.app_data = app_data
-        stats_view.app_data = app_data
+        if event.op == "reload":
+            # Данные перечитаны с диска - передать новые объекты представлениям
+            app_data = event.app_data
+            for view in views.values():
+                view.app_data = app_data
+            event = None
         
-        # Обновить текущее представление
-        if page.navigation_bar.selected_index == 0:
-            log_view.refresh()
-        elif page.navigation_bar.selected_index == 1:
-            wiki_view.refresh()
-        elif page.navigation_bar.selected_index == 2:
-            stats_view.refresh()
+        # Скрытые представления обновятся при показе (их версия устарела)
+        if current_index is None:
+            return
+        if current_index == 0:
+            views[0].refresh(event)
+        else:
+            views[current_index].refresh()
+        shown_versions[current_index] = data_version(current_index)
+    
+    data_manager.events.subscribe(on_data_changed)
     
     # Навигационная панель
+    destinations = [
+        ft.NavigationBarDestination(
+            icon=ft.Icons.HOME,
+            selected_icon=ft.Icons.HOME_OUTLINED,
+            label="Журнал"
+        ),
+        ft.NavigationBarDestination(
+            icon=ft.Icons.BOOK,
+            selected_icon=ft.Icons.BOOK_OUTLINED,
+            label="Справочник"
+        ),
+        ft.NavigationBarDestination(
+            icon=ft.Icons.BAR_CHART,
+            selected_icon=ft.Icons.BAR_CHART_OUTLINED,
+            label="Статистика"
+        )
+    ]
+    if diagnostics:
+        destinations.append(
+            ft.NavigationBarDestination(
+                icon=ft.Icons.SPEED,
+                selected_icon=ft.Icons.SPEED_OUTLINED,
+                label="Диагностика"
+            )
+        )
     page.navigation_bar = ft.NavigationBar(
         selected_index=0,
         on_change=on_navigation_change,
-        destinations=[
-            ft.NavigationBarDestination(
-                icon=ft.Icons.HOME,
-                selected_icon=ft.Icons.HOME_OUTLINED,
-                label="Журнал"
-            ),
-            ft.NavigationBarDestination(
-                icon=ft.Icons.BOOK,
-                selected_icon=ft.Icons.BOOK_OUTLINED,
-                label="Справочник"
-            ),
-            ft.NavigationBarDestination(
-                icon=ft.Icons.BAR_CHART,
-                selected_icon=ft.Icons.BAR_CHART_OUTLINED,
-                label="Статистика"
-            )
-        ],
+        destinations=destinations,
         bgcolor=ft.Colors.SURFACE_CONTAINER_HIGHEST
     )
     
@@ -115,15 +206,53 @@ def main(page: ft.Page):
     page.add(
         ft.Container(
             ref=content_container,
-            content=log_view.build(),
             expand=True
         )
     )
     
+    def on_keyboard(e: ft.KeyboardEvent):
+        """Ctrl+Shift+P - профилировать следующее действие (повторное нажатие - еще одно)"""
+        if not (e.ctrl and e.shift and e.key.upper() == "P"):
+            return
+        pending = sum(profiler.pending().values()) + 1
+        page.snack_bar = ft.SnackBar(
+            content=ft.Text(f"Профилирование следующих действий: {pending} (папка {profiler.output_dir})"),
+            bgcolor=ft.Colors.BLUE
+        )
+        page.snack_bar.open = True
+        updates.request_update("snackbar")
+        # Взводится после показа уведомления, чтобы профиль достался действию пользователя
+        profiler.arm(1)
+    
+    page.on_keyboard_event = on_keyboard
+    
+    def on_write_error(error: Exception):
+        """Сообщить, что изменения пока не записаны на диск (вызывается потоком записи)"""
+        with updates.action("write_error"):
+            page.snack_bar = ft.SnackBar(
+                content=ft.Text(f"Не удалось сохранить изменения, повторная попытка: {error}"),
+                bgcolor=ft.Colors.RED
+            )
+            page.snack_bar.open = True
+            updates.request_update("snackbar")
+    
+    data_manager.on_write_error = on_write_error
+    
+    # Дописать отложенные изменения при закрытии окна
+    page.on_disconnect = lambda e: data_manager.flush()
+    atexit.register(data_manager.close)
+    
     # Инициализация первого представления
-    log_view.refresh()
+    startup.mark("setup")
+    with updates.action("startup"):
+        show_view(0)
+        startup.mark("first_view")
+        updates.request_update("navigation")
+    startup.mark("first_frame")
     
-    page.update()
+    # Отчет о запуске: в консоль при замерах или диагностике, в замерах - интервалы startup.*
+    if diagnostics or instrumentation.enabled:
+        print(startup.report())
 
 
 if __name__ == "__main__":
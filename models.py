@@ -1,56 +1,285 @@
 """
 Модели данных для трекера выловленной рыбы
 """
-from dataclasses import dataclass, asdict
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Iterator, Optional
+import math
 import uuid
 
 
-@dataclass
+# Название постоянного хранилища в событиях и запросах
+PERMANENT = ""
+
+# Коды редкости для колоночного хранения (CatchTable)
+RARITY_CODES = ("common", "uncommon", "rare", "trophy")
+
+# Отображаемые названия редкости
+RARITY_DISPLAY = {
+    "common": "Серая",
+    "uncommon": "Синяя",
+    "rare": "Красная",
+    "trophy": "Зеленая"
+}
+
+
+class Species:
+    """Общие для всех уловов одного вида данные (flyweight)"""
+    __slots__ = ("name", "best_bait", "price_guide")
+    
+    def __init__(self, name: str, best_bait: str, price_guide: float):
+        self.name = name
+        self.best_bait = best_bait
+        self.price_guide = price_guide
+    
+    def __repr__(self):
+        return f"Species({self.name!r}, {self.best_bait!r}, {self.price_guide!r})"
+    
+    @classmethod
+    def intern(cls, name: str, best_bait: str, price_guide: float) -> "Species":
+        """Получить единственный экземпляр вида для этих значений"""
+        key = (name, best_bait, price_guide)
+        species = _SPECIES.get(key)
+        if species is None:
+            species = _SPECIES.setdefault(key, cls(name, best_bait, price_guide))
+        return species
+
+
+# Реестр видов: {(name, best_bait, price_guide): Species}
+_SPECIES: dict[tuple, Species] = {}
+
+
+def _parse_timestamp(value) -> int:
+    """Unix-время из числа или ISO-строки (старый формат)"""
+    if isinstance(value, str):
+        return int(datetime.fromisoformat(value).timestamp())
+    return int(value)
+
+
+@dataclass(slots=True)
 class Fish:
-    """Модель рыбы"""
+    """Модель рыбы (улов); данные вида хранятся в общем Species"""
     id: str
-    name: str
+    species: Species
     rarity: str  # 'common', 'uncommon', 'rare', 'trophy'
-    rarity_display: str  # 'Серая', 'Синяя', 'Красная', 'Зеленая'
     weight: float
-    timestamp: str  # ISO format datetime string
-    price_guide: float
-    best_bait: str
+    timestamp: int  # Unix-время в секундах
     storage: str  # 'temporary' or 'permanent'
     
+    @property
+    def name(self) -> str:
+        return self.species.name
+    
+    @property
+    def best_bait(self) -> str:
+        return self.species.best_bait
+    
+    @property
+    def price_guide(self) -> float:
+        return self.species.price_guide
+    
+    @property
+    def rarity_display(self) -> str:
+        """'Серая', 'Синяя', 'Красная', 'Зеленая'"""
+        return RARITY_DISPLAY.get(self.rarity, "Серая")
+    
     @classmethod
     def create(cls, name: str, rarity: str, weight: float, 
                price_guide: float, best_bait: str, storage: str = "temporary"):
         """Создать новую рыбу"""
-        rarity_map = {
-            "common": "Серая",
-            "uncommon": "Синяя",
-            "rare": "Красная",
-            "trophy": "Зеленая"
-        }
-        
         return cls(
-            id=str(uuid.uuid4()),
-            name=name,
+            id=uuid.uuid4().hex[:16],
+            species=Species.intern(name, best_bait, price_guide),
             rarity=rarity,
-            rarity_display=rarity_map.get(rarity, "Серая"),
             weight=weight,
-            timestamp=datetime.now().isoformat(),
-            price_guide=price_guide,
-            best_bait=best_bait,
+            timestamp=int(datetime.now().timestamp()),
             storage=storage
         )
     
     def to_dict(self):
         """Преобразовать в словарь для JSON"""
-        return asdict(self)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "rarity": self.rarity,
+            "weight": self.weight,
+            "timestamp": self.timestamp,
+            "price_guide": self.price_guide,
+            "best_bait": self.best_bait,
+            "storage": self.storage
+        }
     
     @classmethod
     def from_dict(cls, data: dict):
-        """Создать из словаря"""
-        return cls(**data)
+        """Создать из словаря (понимает и старый формат с ISO-временем)"""
+        return cls(
+            id=data["id"],
+            species=Species.intern(data["name"], data["best_bait"], data["price_guide"]),
+            rarity=data["rarity"],
+            weight=data["weight"],
+            timestamp=_parse_timestamp(data["timestamp"]),
+            storage=data.get("storage", "temporary")
+        )
+    
+    def to_row(self, species_index: dict) -> list:
+        """Компактная строка [id, номер вида, редкость, вес, время] для снимка"""
+        species_no = species_index.setdefault(self.species, len(species_index))
+        return [self.id, species_no, self.rarity, self.weight, self.timestamp]
+    
+    @classmethod
+    def from_row(cls, row: list, species: list[Species], storage: str):
+        """Создать из компактной строки снимка"""
+        fish_id, species_no, rarity, weight, timestamp = row
+        return cls(fish_id, species[species_no], rarity, weight, timestamp, storage)
+
+
+def _fish_from_json(item, species: list[Species], storage: str) -> Fish:
+    """Рыба из снимка: компактная строка или словарь старого формата"""
+    if isinstance(item, list):
+        return Fish.from_row(item, species, storage)
+    return Fish.from_dict(item)
+
+
+# Порядок показа редкостей: от трофейных к обычным
+RARITY_RANK = {"trophy": 0, "rare": 1, "uncommon": 2, "common": 3}
+
+# Пачка больше этой пересортировывается целиком, а не вставляется по одной
+BULK_RESORT = 64
+
+
+def display_order(fish: Fish) -> tuple:
+    """Ключ сортировки для показа: по редкости, затем от тяжелых к легким"""
+    return (RARITY_RANK.get(fish.rarity, 99), -fish.weight)
+
+
+class FishList(list):
+    """Список рыб с поддерживаемыми итогами: общий вес и разбивка по редкости
+    
+    Порядок показа (display_order) строится при первом запросе и дальше
+    поддерживается вставками и удалениями по bisect, поэтому обновление
+    журнала не сортирует все хранилище заново.
+    """
+    
+    def __init__(self, fishes=()):
+        super().__init__(fishes)
+        self._recount()
+    
+    def __reduce__(self):
+        # copy, deepcopy и pickle по умолчанию восстанавливают __dict__ и затем
+        # вызывают extend(), удваивая итоги; итоги пересчитываются в __init__
+        return type(self), (list(self),)
+    
+    def _recount(self):
+        """Пересчитать итоги с нуля"""
+        self._sorted: Optional[list[Fish]] = None  # Порядок показа, если уже построен
+        self.total_weight = 0.0  # Граммы
+        self.rarity_counts = {}  # {rarity: количество}
+        self.rarity_weights = {}  # {rarity: граммы}
+        for fish in self:
+            self._added(fish)
+    
+    def sorted_view(self) -> list[Fish]:
+        """Рыбы в порядке показа (список поддерживается самим FishList, менять его нельзя)"""
+        if self._sorted is None:
+            self._sorted = sorted(self, key=display_order)
+        return self._sorted
+    
+    def _added(self, fish: Fish):
+        # Один nan в сумме испортил бы итоги до следующего _recount
+        assert math.isfinite(fish.weight), f"некорректный вес рыбы {fish.id}: {fish.weight!r}"
+        if self._sorted is not None:
+            insort(self._sorted, fish, key=display_order)
+        self.total_weight += fish.weight
+        self.rarity_counts[fish.rarity] = self.rarity_counts.get(fish.rarity, 0) + 1
+        self.rarity_weights[fish.rarity] = self.rarity_weights.get(fish.rarity, 0.0) + fish.weight
+    
+    def _removed(self, fish: Fish):
+        if self._sorted is not None:
+            self._remove_sorted(fish)
+        if not self:
+            # Пустой список - сбросить накопленную погрешность
+            self.total_weight = 0.0
+            self.rarity_counts = {}
+            self.rarity_weights = {}
+            return
+        self.total_weight -= fish.weight
+        count = self.rarity_counts.get(fish.rarity, 0) - 1
+        if count > 0:
+            self.rarity_counts[fish.rarity] = count
+            self.rarity_weights[fish.rarity] -= fish.weight
+        else:
+            self.rarity_counts.pop(fish.rarity, None)
+            self.rarity_weights.pop(fish.rarity, None)
+    
+    def _remove_sorted(self, fish: Fish):
+        """Убрать рыбу из порядка показа (среди равных ключей - ту же самую)"""
+        key = display_order(fish)
+        index = bisect_left(self._sorted, key, key=display_order)
+        while index < len(self._sorted) and display_order(self._sorted[index]) == key:
+            if self._sorted[index] is fish:
+                del self._sorted[index]
+                return
+            index += 1
+        self._sorted = None  # Не найдена - порядок построится заново
+    
+    def append(self, fish: Fish):
+        super().append(fish)
+        self._added(fish)
+    
+    def insert(self, index, fish: Fish):
+        super().insert(index, fish)
+        self._added(fish)
+    
+    def extend(self, fishes):
+        fishes = list(fishes)
+        if len(fishes) > BULK_RESORT:
+            self._sorted = None  # Перенос целого хранилища: дешевле отсортировать заново
+        super().extend(fishes)
+        for fish in fishes:
+            self._added(fish)
+    
+    def __iadd__(self, fishes):
+        self.extend(fishes)
+        return self
+    
+    def remove(self, fish: Fish):
+        super().remove(fish)
+        self._removed(fish)
+    
+    def pop(self, index=-1) -> Fish:
+        fish = super().pop(index)
+        self._removed(fish)
+        return fish
+    
+    def clear(self):
+        super().clear()
+        self._recount()
+    
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        for fish in removed:
+            self._removed(fish)
+    
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            removed, value = self[index], list(value)
+            added = value
+        else:
+            removed, added = [self[index]], [value]
+        super().__setitem__(index, value)
+        for fish in removed:
+            self._removed(fish)
+        for fish in added:
+            self._added(fish)
+    
+    def __imul__(self, n):
+        super().__imul__(n)
+        self._recount()
+        return self
 
 
 @dataclass
@@ -60,24 +289,39 @@ class TemporaryStorage:
     limit: float  # Лимит в килограммах
     fishes: list[Fish]
     
-    def to_dict(self):
+    def __setattr__(self, name, value):
+        # Итоги по весу поддерживаются самим списком рыб
+        if name == "fishes" and not isinstance(value, FishList):
+            value = FishList(value)
+        super().__setattr__(name, value)
+    
+    def to_dict(self, species_index: Optional[dict] = None):
+        # С таблицей видов рыбы сохраняются компактными строками
+        if species_index is None:
+            fishes = [f.to_dict() for f in self.fishes]
+        else:
+            fishes = [f.to_row(species_index) for f in self.fishes]
         return {
             "name": self.name,
             "limit": self.limit,
-            "fishes": [f.to_dict() for f in self.fishes]
+            "fishes": fishes
         }
     
     @classmethod
-    def from_dict(cls, data: dict):
+    def from_dict(cls, data: dict, species: Optional[list[Species]] = None):
         return cls(
             name=data["name"],
             limit=float(data["limit"]),
-            fishes=[Fish.from_dict(f) for f in data.get("fishes", [])]
+            fishes=[_fish_from_json(f, species, "temporary") for f in data.get("fishes", [])]
         )
     
     def get_total_weight_grams(self) -> float:
         """Получить общий вес рыбы в граммах"""
-        return sum(f.weight for f in self.fishes)
+        return self.fishes.total_weight
+    
+    def get_rarity_breakdown(self) -> dict[str, tuple[int, float]]:
+        """Количество и вес (граммы) рыб по редкости"""
+        return {r: (c, self.fishes.rarity_weights[r]) for r, c in self.fishes.rarity_counts.items()}
     
     def get_total_weight_kg(self) -> float:
         """Получить общий вес рыбы в килограммах"""
@@ -102,19 +346,32 @@ class AppData:
     current_storage_name: str
     permanent_storage_limit: float = 100.0  # Лимит в килограммах
     
+    def __setattr__(self, name, value):
+        # Итоги по весу поддерживаются самим списком рыб
+        if name == "permanent_storage" and not isinstance(value, FishList):
+            value = FishList(value)
+        super().__setattr__(name, value)
+    
     def to_dict(self):
+        # Данные видов записываются один раз в таблицу "species",
+        # рыбы ссылаются на нее по номеру
+        species_index = {}
+        temporary = [ts.to_dict(species_index) for ts in self.temporary_storages]
+        permanent = [f.to_row(species_index) for f in self.permanent_storage]
         return {
-            "temporary_storages": [ts.to_dict() for ts in self.temporary_storages],
-            "permanent_storage": [f.to_dict() for f in self.permanent_storage],
+            "species": [[s.name, s.best_bait, s.price_guide] for s in species_index],
+            "temporary_storages": temporary,
+            "permanent_storage": permanent,
             "current_storage_name": self.current_storage_name,
             "permanent_storage_limit": self.permanent_storage_limit
         }
     
     @classmethod
     def from_dict(cls, data: dict):
+        species = [Species.intern(*s) for s in data.get("species", [])]
         return cls(
-            temporary_storages=[TemporaryStorage.from_dict(ts) for ts in data.get("temporary_storages", [])],
-            permanent_storage=[Fish.from_dict(f) for f in data.get("permanent_storage", [])],
+            temporary_storages=[TemporaryStorage.from_dict(ts, species) for ts in data.get("temporary_storages", [])],
+            permanent_storage=[_fish_from_json(f, species, "permanent") for f in data.get("permanent_storage", [])],
             current_storage_name=data.get("current_storage_name", ""),
             permanent_storage_limit=float(data.get("permanent_storage_limit", 100.0))
         )
@@ -144,9 +401,144 @@ class AppData:
             return self.temporary_storages[0]
         return None
     
+    def count_catches(self) -> int:
+        """Число рыб во всех хранилищах"""
+        return sum(len(s.fishes) for s in self.temporary_storages) + len(self.permanent_storage)
+    
+    def to_catch_table(self) -> "CatchTable":
+        """Колоночное представление всех уловов (для статистики по большим историям)"""
+        return CatchTable.from_app_data(self)
+    
+    def get_storage(self, name: str) -> Optional[TemporaryStorage]:
+        """Найти временное хранилище по названию"""
+        for storage in self.temporary_storages:
+            if storage.name == name:
+                return storage
+        return None
+    
+    # Операции изменения данных. Каждое изменение описывается записью
+    # (op, data), которую DataManager может дописать в журнал и затем
+    # воспроизвести при загрузке через apply_change.
+    
+    def add_fish(self, storage_name: str, fish: Fish):
+        """Добавить рыбу во временное хранилище (PERMANENT - сразу в постоянное, при импорте)"""
+        if storage_name == PERMANENT:
+            fish.storage = "permanent"
+            self.permanent_storage.append(fish)
+            return
+        storage = self.get_storage(storage_name)
+        if storage is None:
+            raise KeyError(storage_name)
+        fish.storage = "temporary"
+        storage.fishes.append(fish)
+    
+    def remove_fish(self, storage_name: str, fish_id: str) -> list[Fish]:
+        """Удалить рыбу из временного хранилища"""
+        storage = self.get_storage(storage_name)
+        if storage is None:
+            return []
+        for index, fish in enumerate(storage.fishes):
+            if fish.id == fish_id:
+                del storage.fishes[index]
+                return [fish]
+        return []
+    
+    def transfer_to_permanent(self, storage_name: str) -> list[Fish]:
+        """Перевести все рыбы из временного хранилища в постоянное"""
+        storage = self.get_storage(storage_name)
+        if storage is None:
+            return []
+        moved = list(storage.fishes)
+        for fish in moved:
+            fish.storage = "permanent"
+        self.permanent_storage.extend(moved)
+        storage.fishes.clear()
+        return moved
+    
+    def sell_all(self) -> list[Fish]:
+        """Продать (очистить) постоянное хранилище"""
+        sold = list(self.permanent_storage)
+        self.permanent_storage.clear()
+        return sold
+    
+    def select_storage(self, name: str):
+        """Сделать хранилище активным"""
+        self.current_storage_name = name
+    
+    def create_storage(self, name: str, limit: float):
+        """Создать временное хранилище и сделать его активным"""
+        self.temporary_storages.append(TemporaryStorage(name=name, limit=limit, fishes=[]))
+        self.current_storage_name = name
+    
+    def update_storage(self, name: str, new_name: str, limit: float):
+        """Переименовать хранилище и/или изменить его лимит"""
+        storage = self.get_storage(name)
+        if storage is None:
+            return
+        if new_name != name:
+            storage.name = new_name
+            if self.current_storage_name == name:
+                self.current_storage_name = new_name
+        storage.limit = limit
+    
+    def delete_storage(self, name: str) -> list[Fish]:
+        """Удалить временное хранилище (возвращает потерянные рыбы)"""
+        storage = self.get_storage(name)
+        self.temporary_storages = [s for s in self.temporary_storages if s.name != name]
+        # Переключиться на первое доступное хранилище
+        if self.temporary_storages:
+            self.current_storage_name = self.temporary_storages[0].name
+        return list(storage.fishes) if storage else []
+    
+    def set_permanent_limit(self, limit: float):
+        """Изменить лимит постоянного хранилища"""
+        self.permanent_storage_limit = limit
+    
+    def apply_change(self, op: str, data: dict) -> "ChangeEvent":
+        """Применить запись изменения (op, data) к данным"""
+        event = ChangeEvent(op)
+        if op == "add_fish":
+            fish = Fish.from_dict(data["fish"])
+            self.add_fish(data["storage"], fish)
+            event.storages = {data["storage"]}
+            event.added = [fish]
+        elif op == "delete_fish":
+            event.removed = self.remove_fish(data["storage"], data["fish_id"])
+            event.storages = {data["storage"]}
+        elif op == "transfer":
+            event.moved = self.transfer_to_permanent(data["storage"])
+            event.storages = {data["storage"], PERMANENT}
+        elif op == "sell":
+            event.removed = self.sell_all()
+            event.storages = {PERMANENT}
+        elif op == "select_storage":
+            self.select_storage(data["name"])
+            event.storages_changed = True
+        elif op == "create_storage":
+            self.create_storage(data["name"], float(data["limit"]))
+            event.storages_changed = True
+        elif op == "update_storage":
+            self.update_storage(data["name"], data["new_name"], float(data["limit"]))
+            event.storages = {data["new_name"]}
+            event.storages_changed = True
+        elif op == "delete_storage":
+            event.removed = self.delete_storage(data["name"])
+            event.storages_changed = True
+        elif op == "set_permanent_limit":
+            self.set_permanent_limit(float(data["limit"]))
+            event.storages = {PERMANENT}
+        else:
+            raise ValueError(f"Неизвестная операция: {op}")
+        return event
+    
     def get_permanent_total_weight_grams(self) -> float:
         """Получить общий вес в постоянном хранилище (граммы)"""
-        return sum(f.weight for f in self.permanent_storage)
+        return self.permanent_storage.total_weight
+    
+    def get_permanent_rarity_breakdown(self) -> dict[str, tuple[int, float]]:
+        """Количество и вес (граммы) рыб постоянного хранилища по редкости"""
+        storage = self.permanent_storage
+        return {r: (c, storage.rarity_weights[r]) for r, c in storage.rarity_counts.items()}
     
     def get_permanent_total_weight_kg(self) -> float:
         """Получить общий вес в постоянном хранилище (кг)"""
@@ -161,3 +553,164 @@ class AppData:
     def get_permanent_available_weight_kg(self) -> float:
         """Получить доступное место в постоянном хранилище (кг)"""
         return max(0, self.permanent_storage_limit - self.get_permanent_total_weight_kg())
+
+
+class CatchTable:
+    """Колоночное хранение уловов: параллельные массивы вместо объектов Fish
+    
+    Суммы, фильтры и группировки выполняются по непрерывным буферам
+    array; объекты Fish создаются только по запросу (row/rows).
+    """
+    
+    def __init__(self):
+        self.ids: list[str] = []
+        self.weights = array('d')  # Граммы
+        self.species_codes = array('H')  # Номер в self.species
+        self.rarity_codes = array('B')  # Номер в RARITY_CODES
+        self.timestamps = array('q')  # Unix-время
+        self.storage_ids = array('H')  # Номер в self.storage_names
+        
+        self.species: list[Species] = []
+        self.storage_names: list[str] = [PERMANENT]  # 0 - постоянное хранилище
+        self._species_codes: dict[Species, int] = {}
+        self._storage_codes: dict[str, int] = {PERMANENT: 0}
+    
+    @classmethod
+    def from_app_data(cls, app_data: "AppData") -> "CatchTable":
+        """Собрать таблицу из всех хранилищ"""
+        table = cls()
+        for storage in app_data.temporary_storages:
+            table.extend(storage.fishes, storage.name)
+        table.extend(app_data.permanent_storage, PERMANENT)
+        return table
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def copy(self) -> "CatchTable":
+        """Независимая копия (расчет по ней не мешает добавлять строки в оригинал)"""
+        table = CatchTable()
+        table.ids = self.ids[:]
+        for name in ("weights", "species_codes", "rarity_codes", "timestamps", "storage_ids"):
+            setattr(table, name, getattr(self, name)[:])
+        table.species = self.species[:]
+        table.storage_names = self.storage_names[:]
+        table._species_codes = dict(self._species_codes)
+        table._storage_codes = dict(self._storage_codes)
+        return table
+    
+    def species_code(self, species: Species) -> int:
+        """Номер вида (добавляется при первом обращении)"""
+        code = self._species_codes.get(species)
+        if code is None:
+            code = self._species_codes[species] = len(self.species)
+            self.species.append(species)
+        return code
+    
+    def storage_code(self, storage_name: str) -> int:
+        """Номер хранилища (добавляется при первом обращении)"""
+        code = self._storage_codes.get(storage_name)
+        if code is None:
+            code = self._storage_codes[storage_name] = len(self.storage_names)
+            self.storage_names.append(storage_name)
+        return code
+    
+    def append(self, fish: Fish, storage_name: str):
+        """Добавить улов"""
+        self.ids.append(fish.id)
+        self.weights.append(fish.weight)
+        self.species_codes.append(self.species_code(fish.species))
+        self.rarity_codes.append(RARITY_CODES.index(fish.rarity) if fish.rarity in RARITY_CODES else 0)
+        self.timestamps.append(fish.timestamp)
+        self.storage_ids.append(self.storage_code(storage_name))
+    
+    def extend(self, fishes: Iterable[Fish], storage_name: str):
+        """Добавить уловы одного хранилища"""
+        for fish in fishes:
+            self.append(fish, storage_name)
+    
+    def remove(self, index: int):
+        """Удалить строку за O(1): на ее место встает последняя строка"""
+        last = len(self.ids) - 1
+        for column in (self.ids, self.weights, self.species_codes,
+                       self.rarity_codes, self.timestamps, self.storage_ids):
+            column[index] = column[last]
+            column.pop()
+    
+    def row(self, index: int) -> Fish:
+        """Создать объект Fish для строки"""
+        storage = "permanent" if self.storage_ids[index] == 0 else "temporary"
+        return Fish(
+            id=self.ids[index],
+            species=self.species[self.species_codes[index]],
+            rarity=RARITY_CODES[self.rarity_codes[index]],
+            weight=self.weights[index],
+            timestamp=self.timestamps[index],
+            storage=storage
+        )
+    
+    def rows(self, indices: Optional[Iterable[int]] = None) -> Iterator[Fish]:
+        """Лениво создавать объекты Fish для строк (по умолчанию - всех)"""
+        if indices is None:
+            indices = range(len(self.ids))
+        for index in indices:
+            yield self.row(index)
+    
+    def filter(self, storage: Optional[str] = None, rarity: Optional[str] = None,
+               min_weight: Optional[float] = None, since: Optional[int] = None) -> list[int]:
+        """Номера строк, подходящих под условия"""
+        checks = []
+        if storage is not None:
+            code = self._storage_codes.get(storage)
+            if code is None:
+                return []
+            checks.append((self.storage_ids, code.__eq__))
+        if rarity is not None:
+            if rarity not in RARITY_CODES:
+                return []
+            checks.append((self.rarity_codes, RARITY_CODES.index(rarity).__eq__))
+        if min_weight is not None:
+            checks.append((self.weights, lambda w: w >= min_weight))
+        if since is not None:
+            checks.append((self.timestamps, lambda t: t >= since))
+        
+        indices = range(len(self.ids))
+        for column, check in checks:
+            indices = [i for i in indices if check(column[i])]
+        return list(indices)
+    
+    def total_weight(self, storage: Optional[str] = None) -> float:
+        """Общий вес (граммы) во всех хранилищах или в одном"""
+        if storage is None:
+            return sum(self.weights)
+        return self.weight_by_storage().get(storage, 0.0)
+    
+    def weight_by_storage(self) -> dict[str, float]:
+        """Общий вес (граммы) по хранилищам"""
+        totals = [0.0] * len(self.storage_names)
+        for storage_id, weight in zip(self.storage_ids, self.weights):
+            totals[storage_id] += weight
+        return {name: totals[code] for code, name in enumerate(self.storage_names)}
+    
+    def count_by_species(self) -> Counter:
+        """Количество уловов по названию вида"""
+        counts = Counter()
+        for code, count in Counter(self.species_codes).items():
+            counts[self.species[code].name] += count
+        return counts
+    
+    def count_by_rarity(self) -> dict[str, int]:
+        """Количество уловов по редкости"""
+        return {RARITY_CODES[code]: count for code, count in Counter(self.rarity_codes).items()}
+
+
+@dataclass
+class ChangeEvent:
+    """Описание изменения данных для подписчиков"""
+    op: str
+    storages: set[str] = field(default_factory=set)  # Затронутые хранилища (PERMANENT - постоянное)
+    added: list[Fish] = field(default_factory=list)
+    removed: list[Fish] = field(default_factory=list)
+    moved: list[Fish] = field(default_factory=list)  # Переведены в постоянное хранилище
+    storages_changed: bool = False  # Изменился список хранилищ или активное хранилище
+    app_data: Optional[AppData] = None  # Новые данные (только для op == "reload")
@@ -0,0 +1,176 @@
+"""
+Профилирование обработчиков событий по запросу (cProfile)
+
+Профилировщик «взводится» на следующие N вызовов обработчиков и
+снимает профиль только их, без перезапуска приложения под cProfile:
+
+    FISH_TOOL_PROFILE=3 python main.py                          # 3 любых действия
+    FISH_TOOL_PROFILE=_on_transfer_to_permanent:2 python main.py
+    FISH_TOOL_PROFILE=_on_add_fish,search:5 python main.py
+
+Каждый профиль пишется в FISH_TOOL_PROFILE_DIR (по умолчанию profiles/)
+двумя файлами: .pstats для pstats/snakeviz и .txt с 20 самыми
+дорогими функциями.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+ENV_VAR = "FISH_TOOL_PROFILE"
+DIR_ENV_VAR = "FISH_TOOL_PROFILE_DIR"
+DEFAULT_DIR = "profiles"
+
+# Сколько функций попадает в текстовую сводку
+TOP_N = 20
+
+# Ключ «любой обработчик»
+ANY = "*"
+
+
+def parse_spec(spec: str) -> dict[str, int]:
+    """Разобрать "N", "имя" и "имя:N" через запятую в {имя или ANY: число вызовов}"""
+    arms = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, sep, count = part.rpartition(":")
+        if not sep:
+            name, count = (ANY, part) if part.isdigit() else (part, "1")
+        if not count.isdigit() or int(count) < 1:
+            raise ValueError(f"Некорректное значение {ENV_VAR}: {part!r}")
+        name = name.strip() or ANY
+        arms[name] = arms.get(name, 0) + int(count)
+    return arms
+
+
+class Profiler:
+    """Снимает профили следующих N вызовов выбранных обработчиков
+    
+    Обработчик выбирается по подстроке его имени (__qualname__), например
+    "_on_transfer_to_permanent" подходит и к открытию диалога, и к его
+    подтверждению. Одновременно снимается один профиль: вложенные и
+    параллельные вызовы выполняются без профилирования.
+    """
+    
+    def __init__(self, output_dir: Optional[str] = None):
+        self.output_dir = Path(output_dir or os.environ.get(DIR_ENV_VAR) or DEFAULT_DIR)
+        self._lock = threading.Lock()
+        self._arms: dict[str, int] = {}  # {подстрока имени или ANY: осталось вызовов}
+        self._active = False  # Профиль уже снимается
+        self._seq = 0
+        self.armed = False  # Быстрая проверка для выключенного профилировщика
+        self.written: list[Path] = []  # Записанные файлы .pstats
+    
+    def arm(self, count: int = 1, handler: str = ANY):
+        """Профилировать следующие count вызовов обработчика (ANY - любого)"""
+        if count < 1:
+            return
+        with self._lock:
+            self._arms[handler] = self._arms.get(handler, 0) + count
+            self.armed = True
+    
+    def disarm(self):
+        """Отменить все ожидающие профили"""
+        with self._lock:
+            self._arms.clear()
+            self.armed = False
+    
+    def pending(self) -> dict[str, int]:
+        """Сколько вызовов еще будет профилировано"""
+        with self._lock:
+            return dict(self._arms)
+    
+    def _take(self, name: str) -> bool:
+        """Забрать один ожидающий профиль для обработчика name"""
+        with self._lock:
+            if self._active:
+                return False
+            key = next((key for key in self._arms if key != ANY and key in name), None)
+            if key is None and ANY in self._arms:
+                key = ANY
+            if key is None:
+                return False
+            self._arms[key] -= 1
+            if self._arms[key] <= 0:
+                del self._arms[key]
+            self.armed = bool(self._arms)
+            self._active = True
+            return True
+    
+    def start(self, name: str) -> Optional[cProfile.Profile]:
+        """Начать профиль, если обработчик name взведен (иначе None)"""
+        if not self.armed or not self._take(name):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Уже работает другой профилировщик (например, запуск под cProfile)
+            with self._lock:
+                self._active = False
+            return None
+        return profile
+    
+    def stop(self, profile: Optional[cProfile.Profile], name: str):
+        """Закончить профиль и записать его"""
+        if profile is None:
+            return
+        profile.disable()
+        try:
+            path = self._write(profile, name)
+            print(f"Профиль {name}: {path}")
+        except OSError as ex:
+            print(f"ERROR при записи профиля {name}: {ex}")
+        finally:
+            with self._lock:
+                self._active = False
+    
+    def _write(self, profile: cProfile.Profile, name: str) -> Path:
+        """Записать .pstats и текстовую сводку; возвращает путь к .pstats"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        safe_name = re.sub(r"[^\w.-]+", "_", name).strip("_") or "handler"
+        # Имена вида LogView._on_add_fish содержат точку, поэтому суффикс дописывается, а не заменяется
+        base = f"{time.strftime('%Y%m%d-%H%M%S')}-{seq:03d}-{safe_name}"
+        
+        path = self.output_dir / (base + ".pstats")
+        profile.dump_stats(str(path))
+        
+        summary = io.StringIO()
+        summary.write(f"{name}\n\n")
+        pstats.Stats(profile, stream=summary).strip_dirs().sort_stats("cumulative").print_stats(TOP_N)
+        (self.output_dir / (base + ".txt")).write_text(summary.getvalue(), encoding="utf-8")
+        self.written.append(path)
+        return path
+    
+    def profiled(self, func: Callable) -> Callable:
+        """Декоратор для функций вне UpdateScheduler.action()"""
+        name = func.__qualname__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = self.start(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.stop(profile, name)
+        
+        return wrapper
+
+
+profiler = Profiler()
+try:
+    _spec = parse_spec(os.environ.get(ENV_VAR, ""))
+except ValueError as ex:
+    # Опечатка в переменной окружения не должна мешать запуску приложения
+    print(f"ERROR: {ex}, профилирование не включено")
+    _spec = {}
+for _handler, _count in _spec.items():
+    profiler.arm(_count, _handler)
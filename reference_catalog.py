@@ -0,0 +1,186 @@
+"""
+Справочник рыб в памяти с индексами для быстрого поиска
+"""
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Optional
+from search_index import SearchIndex, build_grams, search_keys
+
+# Версия формата кэша: кэш другой версии перестраивается
+CACHE_VERSION = 1
+
+
+class ReferenceCatalog:
+    """Разобранный fish_data.json с индексами по названию, наживке и редкости
+    
+    Если задан cache_path, разобранный справочник вместе с индексами,
+    ключами и n-граммами поиска хранится там в pickle. Кэш привязан к
+    размеру, времени изменения и хэшу fish_data.json: при запуске готовые
+    структуры читаются одним чтением, а JSON разбирается, только если
+    файл изменился.
+    """
+    
+    def __init__(self, path: Path, cache_path: Optional[Path] = None):
+        self.path = path
+        self.cache_path = cache_path
+        self.version = 0  # Увеличивается при каждом перечитывании файла
+        self.cache_hits = 0  # Сколько раз справочник взят из кэша, а не разобран
+        
+        self._file_key = None  # (mtime_ns, size) разобранного файла
+        self._data = {"рыбы": []}
+        self._by_name = {}  # {название в нижнем регистре: рыба}
+        self._by_bait = {}  # {наживка в нижнем регистре: [рыбы]}
+        self._by_rarity = {}  # {редкость: [рыбы]}
+        self._search_keys = []  # Ключи SearchIndex в порядке справочника
+        self._search_grams = {}  # n-граммы SearchIndex по этим ключам
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Ключ для поиска без учета регистра"""
+        return text.strip().lower()
+    
+    def _ensure_fresh(self):
+        """Перечитать файл, если он изменился с прошлого разбора"""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return
+        file_key = (stat.st_mtime_ns, stat.st_size)
+        if file_key == self._file_key:
+            return
+        
+        if self.cache_path is not None and self._load_cache(file_key):
+            self._file_key = file_key
+            return
+        
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        self._build(json.loads(raw.decode('utf-8')))
+        self._file_key = file_key
+        if self.cache_path is not None:
+            self._save_cache(file_key, hashlib.sha256(raw).hexdigest())
+    
+    def _load_cache(self, file_key: tuple[int, int]) -> bool:
+        """Взять справочник из кэша, если он построен по этому же файлу"""
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cache = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as ex:
+            # Испорченный кэш не мешает запуску: справочник разбирается заново
+            print(f"Кэш справочника не прочитан ({ex}), справочник будет разобран заново")
+            return False
+        
+        if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+            return False
+        if cache["file_key"] != file_key:
+            # Время изменения могло смениться без изменения содержимого (копирование, checkout)
+            if cache["file_key"][1] != file_key[1] or cache["sha256"] != self._file_hash():
+                return False
+        
+        self._data = cache["data"]
+        self._by_name = cache["by_name"]
+        self._by_bait = cache["by_bait"]
+        self._by_rarity = cache["by_rarity"]
+        self._search_keys = cache["search_keys"]
+        self._search_grams = cache["search_grams"]
+        self.version += 1
+        self.cache_hits += 1
+        if cache["file_key"] != file_key:
+            self._save_cache(file_key, cache["sha256"])
+        return True
+    
+    def _save_cache(self, file_key: tuple[int, int], sha256: str):
+        """Записать разобранный справочник и индексы (атомарно)"""
+        cache = {
+            "version": CACHE_VERSION,
+            "file_key": file_key,
+            "sha256": sha256,
+            "data": self._data,
+            "by_name": self._by_name,
+            "by_bait": self._by_bait,
+            "by_rarity": self._by_rarity,
+            "search_keys": self._search_keys,
+            "search_grams": self._search_grams
+        }
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as ex:
+            # Без кэша справочник просто разбирается при каждом запуске
+            print(f"ERROR при записи кэша справочника: {ex}")
+    
+    def _file_hash(self) -> str:
+        """SHA-256 содержимого fish_data.json"""
+        with open(self.path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    
+    def _build(self, data: dict):
+        """Построить индексы"""
+        by_name, by_bait, by_rarity = {}, {}, {}
+        for fish in data.get("рыбы", []):
+            by_name.setdefault(self.normalize(fish["name"]), fish)
+            by_rarity.setdefault(fish.get("rarity", "common"), []).append(fish)
+            
+            # "Колеблющаяся блесна / Креветки" ищется и целиком, и по частям
+            bait = fish.get("best_bait", "")
+            keys = {self.normalize(bait)}
+            keys.update(self.normalize(part) for part in bait.split("/"))
+            for key in keys:
+                if key:
+                    by_bait.setdefault(key, []).append(fish)
+        
+        self._data = data
+        self._by_name = by_name
+        self._by_bait = by_bait
+        self._by_rarity = by_rarity
+        self._search_keys = search_keys(data.get("рыбы", []))
+        self._search_grams = build_grams(self._search_keys)
+        self.version += 1
+    
+    def check_version(self) -> int:
+        """Перечитать файл, если он изменился, и вернуть версию справочника"""
+        self._ensure_fresh()
+        return self.version
+    
+    @property
+    def data(self) -> dict:
+        """Весь справочник в формате fish_data.json"""
+        self._ensure_fresh()
+        return self._data
+    
+    @property
+    def fishes(self) -> list[dict]:
+        """Список рыб справочника"""
+        self._ensure_fresh()
+        return self._data.get("рыбы", [])
+    
+    def search_index(self) -> SearchIndex:
+        """Новый индекс поиска по названию и наживке из готовых ключей и n-грамм"""
+        self._ensure_fresh()
+        return SearchIndex(self.fishes, keys=self._search_keys, grams=self._search_grams)
+    
+    def names(self) -> list[str]:
+        """Названия рыб в порядке справочника"""
+        return [f["name"] for f in self.fishes]
+    
+    def get(self, name: str) -> Optional[dict]:
+        """Найти рыбу по названию (без учета регистра)"""
+        self._ensure_fresh()
+        return self._by_name.get(self.normalize(name))
+    
+    def by_bait(self, bait: str) -> list[dict]:
+        """Рыбы, которые ловятся на наживку (без учета регистра)"""
+        self._ensure_fresh()
+        return self._by_bait.get(self.normalize(bait), [])
+    
+    def by_rarity(self, rarity: str) -> list[dict]:
+        """Рыбы указанной редкости"""
+        self._ensure_fresh()
+        return self._by_rarity.get(rarity, [])
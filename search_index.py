@@ -0,0 +1,221 @@
+"""
+Индексы поиска по справочнику рыб: n-граммы для подстрок и префиксное дерево
+"""
+from bisect import bisect_left
+from typing import Iterable, Mapping, Optional
+
+
+# Длина n-грамм: запросы короче N ищутся по 1- и 2-граммам
+N = 3
+
+
+def normalize(text: str) -> str:
+    """Ключ поиска: без учета регистра и с «ё», равной «е»"""
+    return text.casefold().replace("ё", "е")
+
+
+def search_keys(items: list[dict], fields: Iterable[str] = ("name", "best_bait")) -> list[str]:
+    """Ключи поиска записей; поля разделены "\n", чтобы подстрока не склеивала название с наживкой"""
+    return [normalize("\n".join(item.get(f, "") for f in fields)) for item in items]
+
+
+def build_grams(keys: list[str]) -> dict[str, list[int]]:
+    """Индекс {n-грамма: номера ключей по возрастанию} для всех 1..N-грамм"""
+    index: dict[str, list[int]] = {}
+    for number, key in enumerate(keys):
+        grams = set()
+        for n in range(1, N + 1):
+            grams.update(key[i:i + n] for i in range(len(key) - n + 1))
+        for gram in grams:
+            index.setdefault(gram, []).append(number)
+    return index
+
+
+class SearchIndex:
+    """Поиск подстроки в названии и наживке без перебора всего справочника
+    
+    Для каждой записи индексируются все 1-, 2- и 3-граммы. Кандидаты
+    на запрос - пересечение списков его n-грамм, затем подстрока
+    проверяется только у них. Если новый запрос содержит предыдущий
+    (пользователь допечатал символ), ищется только среди прошлых
+    результатов.
+    """
+    
+    def __init__(self, items: list[dict], fields: Iterable[str] = ("name", "best_bait"),
+                 keys: Optional[list[str]] = None, grams: Optional[dict[str, list[int]]] = None):
+        self.items = items
+        # Готовые ключи и n-граммы (keys, grams) приходят из кэша справочника
+        self._keys = search_keys(items, fields) if keys is None else keys
+        self._grams = build_grams(self._keys) if grams is None else grams  # Списки не изменяются
+        
+        self._last_query = ""
+        self._last_result = list(range(len(items)))
+    
+    def _candidates(self, query: str) -> list[int]:
+        """Записи, содержащие все n-граммы запроса"""
+        if len(query) <= N:
+            return self._grams.get(query, [])
+        postings = []
+        for i in range(len(query) - N + 1):
+            posting = self._grams.get(query[i:i + N])
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                return []
+        return sorted(result)
+    
+    def search_numbers(self, query: str) -> list[int]:
+        """Номера записей, содержащих запрос (в порядке справочника)"""
+        query = normalize(query.strip())
+        if not query:
+            result = list(range(len(self.items)))
+        elif self._last_query and self._last_query in query:
+            # Запрос уточнился - результат только сужается
+            result = [number for number in self._last_result if query in self._keys[number]]
+        else:
+            candidates = self._candidates(query)
+            if len(query) <= N:
+                result = list(candidates)  # Копия: список индекса не должен меняться
+            else:
+                result = [number for number in candidates if query in self._keys[number]]
+        
+        self._last_query = query
+        self._last_result = result
+        return result
+    
+    def search(self, query: str) -> list[dict]:
+        """Записи, содержащие запрос в названии или наживке"""
+        return [self.items[number] for number in self.search_numbers(query)]
+
+
+class _TrieNode:
+    """Узел префиксного дерева"""
+    __slots__ = ("children", "numbers")
+    
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.numbers: list[int] = []  # Номера названий в поддереве, по возрастанию
+
+
+class PrefixTrie:
+    """Префиксное дерево названий для автодополнения
+    
+    Название находится по началу любого своего слова ("карп" найдет
+    "Зеркальный карп"). Если по префиксу ничего нет, ищутся названия,
+    начало которых отличается от запроса на одну правку.
+    """
+    
+    # Символы, после которых начинается новое слово
+    WORD_SEPARATORS = " -/"
+    # С какой длины запроса искать с опечаткой (короче - слишком много совпадений)
+    FUZZY_MIN_LENGTH = 3
+    
+    def __init__(self, names: Iterable[str]):
+        self.names: list[str] = []
+        self._numbers: dict[str, int] = {}  # {название: номер}
+        self._root = _TrieNode()
+        for name in names:
+            self.add(name)
+    
+    def add(self, name: str):
+        """Добавить название"""
+        if name in self._numbers:
+            return
+        number = self._numbers[name] = len(self.names)
+        self.names.append(name)
+        
+        key = normalize(name)
+        starts = [0] + [i + 1 for i, ch in enumerate(key) if ch in self.WORD_SEPARATORS]
+        for start in starts:
+            node = self._root
+            for ch in key[start:]:
+                node = node.children.setdefault(ch, _TrieNode())
+                # Номера добавляются по возрастанию, повтор возможен только подряд
+                if not node.numbers or node.numbers[-1] != number:
+                    node.numbers.append(number)
+    
+    def _find(self, prefix: str, node: Optional[_TrieNode] = None) -> Optional[_TrieNode]:
+        """Узел, соответствующий префиксу (от корня или от node)"""
+        node = node or self._root
+        for ch in prefix:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+    
+    def _one_edit(self, prefix: str) -> list[int]:
+        """Номера названий, начало которых отличается от префикса одной правкой
+        
+        Вместо полного перебора проверяются все варианты одной правки
+        (замена, вставка, удаление, перестановка соседних букв) -
+        это несколько сотен переходов по дереву.
+        """
+        found = set()
+        node = self._root
+        for i in range(len(prefix)):
+            rest = prefix[i:]
+            # Удаление лишней буквы и перестановка соседних
+            deleted = self._find(rest[1:], node)
+            if deleted is not None:
+                found.update(deleted.numbers)
+            if len(rest) > 1:
+                swapped = self._find(rest[1] + rest[0] + rest[2:], node)
+                if swapped is not None:
+                    found.update(swapped.numbers)
+            # Замена буквы и пропущенная буква
+            for ch, child in node.children.items():
+                if ch != rest[0]:
+                    replaced = self._find(rest[1:], child)
+                    if replaced is not None:
+                        found.update(replaced.numbers)
+                inserted = self._find(rest, child)
+                if inserted is not None:
+                    found.update(inserted.numbers)
+            node = node.children.get(prefix[i])
+            if node is None:
+                break
+        return sorted(found)
+    
+    def complete(self, query: str, limit: int = 8, counts: Optional[Mapping[str, int]] = None) -> list[str]:
+        """Лучшие limit названий для введенного начала
+        
+        counts - сколько раз ловилась каждая рыба: частые уловы идут
+        первыми, остальные - в порядке справочника.
+        """
+        prefix = normalize(query.strip())
+        if not prefix:
+            numbers = range(len(self.names))
+        else:
+            node = self._find(prefix)
+            if node is not None:
+                numbers = node.numbers
+            elif len(prefix) >= self.FUZZY_MIN_LENGTH:
+                numbers = self._one_edit(prefix)
+            else:
+                numbers = []
+        
+        ranked = []
+        if counts:
+            # Пойманных видов немного: проверить каждый двоичным поиском
+            hits = []
+            for name, count in counts.items():
+                number = self._numbers.get(name)
+                if count > 0 and number is not None:
+                    position = bisect_left(numbers, number)
+                    if position < len(numbers) and numbers[position] == number:
+                        hits.append((-count, number))
+            hits.sort()
+            ranked = [number for _, number in hits[:limit]]
+        
+        chosen = set(ranked)
+        for number in numbers:
+            if len(ranked) >= limit:
+                break
+            if number not in chosen:
+                ranked.append(number)
+        return [self.names[number] for number in ranked]
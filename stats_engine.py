@@ -0,0 +1,380 @@
+"""
+Вычисление статистики улова: по колоночной таблице CatchTable и инкрементально
+"""
+import heapq
+import threading
+from collections import Counter
+from operator import attrgetter
+from typing import Optional
+from models import AppData, CatchTable, ChangeEvent, Fish, PERMANENT, RARITY_CODES
+
+# Модуль numpy; None - еще не импортирован, False - не установлен
+_np = None
+
+
+# Перцентили веса, которые считаются для каждого вида
+PERCENTILES = (50, 90)
+
+
+def empty_stats() -> dict:
+    """Статистика без уловов"""
+    return {
+        "total": 0,
+        "total_weight_kg": 0,
+        "total_value": 0,
+        "most_common": None,
+        "max_weight": None,
+        "rarity_distribution": {},
+        "top_fishes": [],
+        "species_stats": []
+    }
+
+
+def compute_stats(table: CatchTable) -> dict:
+    """Вычислить статистику (векторно, если установлен NumPy)"""
+    if len(table) == 0:
+        return empty_stats()
+    np = _numpy()
+    if np:
+        return _compute_numpy(table, np)
+    return _compute_python(table)
+
+
+def _numpy():
+    """NumPy импортируется при первом расчете, а не при запуске приложения"""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:  # NumPy необязателен: без него статистика считается на чистом Python
+            _np = False
+    return _np
+
+
+def _species_names(table: CatchTable) -> tuple[list[str], list[int]]:
+    """Названия видов и номер названия для каждого кода вида
+    
+    Один вид может встречаться с разными наживкой/ценой, поэтому
+    группировка идет по названию, а не по коду Species.
+    """
+    names, name_codes, index = [], [], {}
+    for species in table.species:
+        code = index.get(species.name)
+        if code is None:
+            code = index[species.name] = len(names)
+            names.append(species.name)
+        name_codes.append(code)
+    return names, name_codes
+
+
+def _compute_numpy(table: CatchTable, np) -> dict:
+    """Все показатели за один проход по массивам NumPy"""
+    # Буферы array читаются без копирования
+    weights = np.frombuffer(table.weights, dtype=np.float64)
+    species_codes = np.frombuffer(table.species_codes, dtype=np.uint16)
+    rarity_codes = np.frombuffer(table.rarity_codes, dtype=np.uint8)
+    
+    names, species_to_name = _species_names(table)
+    species_to_name = np.asarray(species_to_name, dtype=np.uint16)
+    if len(names) == len(table.species):
+        name_codes = species_codes  # Названия не повторяются - коды совпадают
+    else:
+        name_codes = species_to_name[species_codes]
+    prices = np.asarray([s.price_guide for s in table.species], dtype=np.float64)
+    
+    counts = np.bincount(name_codes, minlength=len(names))
+    sums = np.bincount(name_codes, weights=weights, minlength=len(names))
+    rarity_counts = np.bincount(rarity_codes, minlength=len(RARITY_CODES))
+    
+    # Стоимость: количество уловов каждого Species на его цену
+    species_counts = np.bincount(species_codes, minlength=len(table.species))
+    values = np.bincount(species_to_name, weights=species_counts * prices, minlength=len(names))
+    
+    # Порядок по виду (поразрядная сортировка uint16 - линейное время);
+    # внутри каждого вида перцентили считаются частичной сортировкой
+    order = np.argsort(name_codes, kind="stable")
+    sorted_weights = weights[order]
+    ends = np.cumsum(counts)
+    
+    species_stats = []
+    for code in np.flatnonzero(counts):
+        segment = sorted_weights[ends[code] - counts[code]:ends[code]]
+        percentiles = np.percentile(segment, PERCENTILES)
+        species_stats.append({
+            "name": names[code],
+            "count": int(counts[code]),
+            "mean": float(sums[code] / counts[code]),
+            "min": float(segment.min()),
+            "max": float(segment.max()),
+            "percentiles": {p: float(v) for p, v in zip(PERCENTILES, percentiles)},
+            "value": float(values[code])
+        })
+    species_stats.sort(key=lambda s: -s["count"])
+    
+    # Частота: при равенстве - порядок первого появления, как у Counter
+    by_count = np.argsort(-counts, kind="stable")
+    top = [(names[c], int(counts[c])) for c in by_count[:5] if counts[c] > 0]
+    
+    return {
+        "total": len(table),
+        "total_weight_kg": float(weights.sum()) / 1000,
+        "total_value": float(values.sum()),
+        "most_common": top[0],
+        "max_weight": table.row(int(weights.argmax())),
+        "rarity_distribution": {
+            RARITY_CODES[code]: int(count) for code, count in enumerate(rarity_counts) if count
+        },
+        "top_fishes": top,
+        "species_stats": species_stats
+    }
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    """Перцентиль с линейной интерполяцией (как np.percentile по умолчанию)"""
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _compute_python(table: CatchTable) -> dict:
+    """Те же показатели без NumPy"""
+    names, species_to_name = _species_names(table)
+    groups = [[] for _ in names]
+    values = [0.0] * len(names)
+    for species_code, weight in zip(table.species_codes, table.weights):
+        name_code = species_to_name[species_code]
+        groups[name_code].append(weight)
+        values[name_code] += table.species[species_code].price_guide
+    
+    species_stats = []
+    for code, group in enumerate(groups):
+        if not group:
+            continue
+        group.sort()
+        species_stats.append({
+            "name": names[code],
+            "count": len(group),
+            "mean": sum(group) / len(group),
+            "min": group[0],
+            "max": group[-1],
+            "percentiles": {p: _percentile(group, p) for p in PERCENTILES},
+            "value": values[code]
+        })
+    species_stats.sort(key=lambda s: -s["count"])
+    
+    name_counter = Counter({names[c]: len(g) for c, g in enumerate(groups) if g})
+    top = name_counter.most_common(5)
+    max_index = max(range(len(table)), key=table.weights.__getitem__)
+    
+    return {
+        "total": len(table),
+        "total_weight_kg": sum(table.weights) / 1000,
+        "total_value": sum(values),
+        "most_common": top[0],
+        "max_weight": table.row(max_index),
+        "rarity_distribution": table.count_by_rarity(),
+        "top_fishes": top,
+        "species_stats": species_stats
+    }
+
+
+class StatsAccumulator:
+    """Статистика улова, обновляемая по событиям изменения данных
+    
+    Итоги, счетчики по названию и редкости, рекордная рыба и топ-5
+    поддерживаются на каждом событии, поэтому открытие страницы
+    статистики не перебирает все хранилища. Статистика по видам
+    (перцентили) считается по собственной таблице CatchTable и
+    кэшируется до следующего изменения улова.
+    """
+    
+    def __init__(self):
+        self.version = 0  # Увеличивается при каждом изменении улова
+        self._species_cache = (-1, [])  # (version, species_stats)
+        self._deferred: Optional[AppData] = None  # Данные для отложенного пересчета
+        # События приходят из потоков обработчиков Flet, пока другой поток читает статистику
+        self._lock = threading.RLock()
+        self._reset()
+    
+    def _reset(self):
+        """Обнулить все показатели"""
+        self.total = 0
+        self.total_weight = 0.0  # Граммы
+        self.total_value = 0.0
+        self.name_counts = Counter()
+        self._names_counted = False  # name_counts уже посчитан, хотя пересчет еще отложен
+        self.rarity_counts = Counter()
+        
+        self.table = CatchTable()
+        self._rows: dict[str, int] = {}  # {id рыбы: строка в self.table}
+        self._heap = []  # (-вес, порядковый номер, рыба); удаленные выбрасываются при чтении
+        self._heap_seq = 0
+    
+    def rebuild(self, app_data: AppData):
+        """Пересчитать все с нуля (при запуске и после перечитывания файла)"""
+        with self._lock:
+            self._deferred = None
+            self._reset()
+            for storage in app_data.temporary_storages:
+                for fish in storage.fishes:
+                    self._add(fish, storage.name)
+            for fish in app_data.permanent_storage:
+                self._add(fish, PERMANENT)
+            self.version += 1
+    
+    def defer(self, app_data: AppData):
+        """Пересчитать при первом обращении к статистике, а не сейчас (быстрый запуск)"""
+        with self._lock:
+            self._reset()
+            self._deferred = app_data
+            self.version += 1
+    
+    def ensure_built(self):
+        """Выполнить отложенный пересчет"""
+        with self._lock:
+            if self._deferred is not None:
+                self.rebuild(self._deferred)
+    
+    def apply(self, event: ChangeEvent):
+        """Учесть изменение данных (подписчик EventBus)"""
+        with self._lock:
+            if event.op == "reload":
+                self.rebuild(event.app_data)
+                return
+            if self._deferred is not None:
+                # Изменение уже внесено в данные и попадет в отложенный пересчет
+                if self._names_counted:
+                    self.name_counts.update(fish.name for fish in event.added)
+                    self.name_counts.subtract(fish.name for fish in event.removed)
+                    self.name_counts += Counter()  # Убрать нулевые счетчики
+                self.version += 1
+                return
+            if not (event.added or event.removed or event.moved):
+                return
+        
+            # Рыба добавляется только в одно хранилище
+            storage_name = next(iter(event.storages), PERMANENT)
+            for fish in event.added:
+                self._add(fish, storage_name)
+            for fish in event.removed:
+                self._remove(fish)
+            for fish in event.moved:
+                # Итоги при переносе не меняются, только хранилище строки
+                row = self._rows.get(fish.id)
+                if row is not None:
+                    self.table.storage_ids[row] = 0
+            self.version += 1
+    
+    def _add(self, fish: Fish, storage_name: str):
+        """Учесть новую рыбу"""
+        if fish.id in self._rows:
+            return
+        row = len(self.table)
+        self.table.append(fish, storage_name)
+        self._rows[fish.id] = row  # Только после успешного добавления строки
+        
+        self.total += 1
+        self.total_weight += fish.weight
+        self.total_value += fish.price_guide
+        self.name_counts[fish.name] += 1
+        self.rarity_counts[fish.rarity] += 1
+        
+        self._heap_seq += 1
+        heapq.heappush(self._heap, (-fish.weight, self._heap_seq, fish))
+    
+    def _remove(self, fish: Fish):
+        """Учесть удаление рыбы"""
+        row = self._rows.pop(fish.id, None)
+        if row is None:
+            return
+        # Последняя строка таблицы встает на место удаленной
+        last_id = self.table.ids[-1]
+        self.table.remove(row)
+        if last_id != fish.id:
+            self._rows[last_id] = row
+        
+        self.total -= 1
+        self.total_weight -= fish.weight
+        self.total_value -= fish.price_guide
+        if self.total == 0:
+            # Не копить ошибку округления после удаления всех рыб
+            self.total_weight = self.total_value = 0.0
+        for counter, key in ((self.name_counts, fish.name), (self.rarity_counts, fish.rarity)):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+        
+        # Куча не должна расти бесконечно из-за удаленных записей
+        if len(self._heap) > 2 * self.total + 64:
+            self._heap = [entry for entry in self._heap if self._is_alive(entry[2])]
+            heapq.heapify(self._heap)
+    
+    def _is_alive(self, fish: Fish) -> bool:
+        """Рыба еще учитывается в статистике"""
+        return fish.id in self._rows
+    
+    @property
+    def record(self) -> Optional[Fish]:
+        """Самая тяжелая рыба"""
+        with self._lock:
+            self.ensure_built()
+            while self._heap and not self._is_alive(self._heap[0][2]):
+                heapq.heappop(self._heap)
+            return self._heap[0][2] if self._heap else None
+    
+    def catch_counts(self) -> Counter:
+        """Сколько раз ловилась каждая рыба, без отложенного пересчета
+        
+        Подсказкам названий нужны только эти счетчики: один проход по
+        названиям в разы дешевле полного пересчета с таблицей и кучей.
+        """
+        with self._lock:
+            if self._deferred is not None and not self._names_counted:
+                names = attrgetter("name")
+                for storage in self._deferred.temporary_storages:
+                    self.name_counts.update(map(names, storage.fishes))
+                self.name_counts.update(map(names, self._deferred.permanent_storage))
+                self._names_counted = True
+            return Counter(self.name_counts)  # Копия: счетчики меняются из других потоков
+    
+    def top_fishes(self, n: int = 5) -> list[tuple[str, int]]:
+        """Самые частые уловы по названию"""
+        with self._lock:
+            self.ensure_built()
+            return self.name_counts.most_common(n)
+    
+    def species_stats(self) -> list[dict]:
+        """Статистика по видам (пересчитывается только после изменений)"""
+        with self._lock:
+            self.ensure_built()
+            version, species_stats = self._species_cache
+            if version == self.version:
+                return species_stats
+            # Считается по копии: NumPy читает буферы массивов, а их нельзя расширять
+            # во время чтения, и новые уловы не должны ждать конца расчета
+            version, table = self.version, self.table.copy()
+        species_stats = compute_stats(table)["species_stats"]
+        with self._lock:
+            if self._species_cache[0] < version:
+                self._species_cache = (version, species_stats)
+        return species_stats
+    
+    def stats(self) -> dict:
+        """Статистика в формате compute_stats"""
+        species_stats = self.species_stats()  # Долгий расчет - без блокировки
+        with self._lock:
+            if self.total == 0:
+                return empty_stats()
+            top = self.top_fishes()
+            return {
+                "total": self.total,
+                "total_weight_kg": self.total_weight / 1000,
+                "total_value": self.total_value,
+                "most_common": top[0],
+                "max_weight": self.record,
+                "rarity_distribution": dict(self.rarity_counts),
+                "top_fishes": top,
+                "species_stats": species_stats
+            }
@@ -0,0 +1,523 @@
+"""
+Хранилища пользовательских данных (бэкенды DataManager)
+"""
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+from models import AppData, Fish, TemporaryStorage, PERMANENT
+
+
+# После стольких записей в журнале снимок перезаписывается целиком,
+# а журнал очищается. Для больших историй порог - число рыб в снимке:
+# иначе массовый импорт переписывал бы весь снимок на каждой пачке.
+JOURNAL_COMPACT_THRESHOLD = 500
+
+
+def _written():
+    """Запись, уже выполненная при подготовке"""
+
+
+def _file_signature(path: Path) -> Optional[tuple]:
+    """(mtime_ns, size) файла или None, если файла нет"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class StorageBackend:
+    """Базовый интерфейс хранилища данных"""
+    
+    # Байт записано последней операцией (None - хранилище не знает)
+    last_write_bytes: Optional[int] = None
+    
+    # Номер последнего изменения, примененного к данным в памяти
+    applied_seq = 0
+    
+    def load(self) -> AppData:
+        """Загрузить данные приложения"""
+        raise NotImplementedError
+    
+    def save(self, app_data: AppData):
+        """Сохранить данные приложения целиком"""
+        raise NotImplementedError
+    
+    def record(self, app_data: AppData, op: str, data: dict):
+        """Сохранить одно изменение, уже примененное к app_data"""
+        self.record_many(app_data, [(op, data)])
+    
+    def record_many(self, app_data: AppData, changes: list[tuple[str, dict]],
+                    first_seq: Optional[int] = None):
+        """Сохранить пачку изменений (op, data), уже примененных к app_data"""
+        self.save(app_data)
+    
+    def assign_seq(self, count: int = 1) -> int:
+        """Выдать номера изменениям, только что примененным к данным; возвращает первый
+        
+        Вызывается под той же блокировкой, что и применение изменений,
+        поэтому снимок, снятый под ней, покрывает ровно изменения с
+        номерами до applied_seq.
+        """
+        first = self.applied_seq + 1
+        self.applied_seq += count
+        return first
+    
+    def prepare_save(self, app_data: AppData) -> Callable[[], None]:
+        """Снять данные для полной записи (под блокировкой данных)
+        
+        Возвращает запись на диск, которую можно выполнить уже без
+        блокировки. По умолчанию запись выполняется сразу.
+        """
+        self.save(app_data)
+        return _written
+    
+    def prepare_record_many(self, app_data: AppData, changes: list[tuple[str, dict]],
+                            first_seq: Optional[int] = None) -> Callable[[], None]:
+        """Подготовить запись пачки изменений (см. prepare_save)"""
+        self.record_many(app_data, changes, first_seq)
+        return _written
+    
+    def query_catches(self, app_data: AppData, storage: Optional[str] = None,
+                      rarity: Optional[str] = None, min_weight: Optional[float] = None,
+                      since: Optional[int] = None) -> list[Fish]:
+        """Найти рыбы по хранилищу, редкости, минимальному весу и времени (Unix-время)"""
+        if storage is None:
+            sources = [s.fishes for s in app_data.temporary_storages]
+            sources.append(app_data.permanent_storage)
+        elif storage == PERMANENT:
+            sources = [app_data.permanent_storage]
+        else:
+            found = app_data.get_storage(storage)
+            sources = [found.fishes] if found else []
+        
+        result = []
+        for fishes in sources:
+            for fish in fishes:
+                if rarity is not None and fish.rarity != rarity:
+                    continue
+                if min_weight is not None and fish.weight < min_weight:
+                    continue
+                if since is not None and fish.timestamp < since:
+                    continue
+                result.append(fish)
+        return result
+    
+    def signature(self) -> tuple:
+        """Отпечаток файлов на диске (меняется при любой записи в них)"""
+        return ()
+    
+    def close(self):
+        """Освободить ресурсы"""
+
+
+class JsonBackend(StorageBackend):
+    """JSON снимок + журнал изменений (бэкенд по умолчанию)"""
+    
+    def __init__(self, saved_data_path: Path, journal_path: Path, journal: bool = True):
+        self.saved_data_path = saved_data_path
+        self.journal_path = journal_path
+        
+        # Журналируемый режим: каждое изменение дописывается в журнал
+        # одной строкой, снимок периодически уплотняется
+        self.journal = journal
+        self._journal_records = 0  # Записей в журнале после последнего снимка
+        self._compact_threshold = JOURNAL_COMPACT_THRESHOLD
+    
+    def load(self) -> AppData:
+        """Загрузить снимок и воспроизвести хвост журнала"""
+        if not self.saved_data_path.exists():
+            app_data = AppData.create_default()
+            self.applied_seq = 0
+            self._replay_journal(app_data, 0)
+            self.save(app_data)
+            return app_data
+        
+        with open(self.saved_data_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        app_data = AppData.from_dict(data)
+        
+        snapshot_seq = int(data.get("journal_seq", 0))
+        self.applied_seq = snapshot_seq
+        self._replay_journal(app_data, snapshot_seq)
+        
+        self._compact_threshold = max(JOURNAL_COMPACT_THRESHOLD, app_data.count_catches())
+        if self._journal_records >= self._compact_threshold:
+            self.save(app_data)
+        return app_data
+    
+    def save(self, app_data: AppData):
+        """Сохранить снимок данных приложения и очистить журнал"""
+        self.prepare_save(app_data)()
+    
+    def prepare_save(self, app_data: AppData) -> Callable[[], None]:
+        """Сериализовать снимок под блокировкой данных; запись на диск - в возвращенной функции
+        
+        Снимок помечается номером последнего примененного изменения:
+        записи журнала с номерами не больше него при загрузке пропускаются,
+        даже если дописаны уже после снимка.
+        """
+        data = app_data.to_dict()
+        data["journal_seq"] = self.applied_seq
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        catches = app_data.count_catches()
+        return lambda: self._write_snapshot(text, catches)
+    
+    def _write_snapshot(self, text: str, catches: int):
+        """Записать сериализованный снимок и очистить журнал"""
+        # Запись во временный файл и атомарная замена: сбой посреди записи
+        # не повреждает предыдущий снимок
+        tmp_path = self.saved_data_path.with_name(self.saved_data_path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+            self.last_write_bytes = os.fstat(f.fileno()).st_size
+        os.replace(tmp_path, self.saved_data_path)
+        
+        # Все записи журнала вошли в снимок
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self._journal_records = 0
+        self._compact_threshold = max(JOURNAL_COMPACT_THRESHOLD, catches)
+    
+    def record_many(self, app_data: AppData, changes: list[tuple[str, dict]],
+                    first_seq: Optional[int] = None):
+        """Дописать изменения в журнал одной записью"""
+        self.prepare_record_many(app_data, changes, first_seq)()
+    
+    def prepare_record_many(self, app_data: AppData, changes: list[tuple[str, dict]],
+                            first_seq: Optional[int] = None) -> Callable[[], None]:
+        """Сериализовать записи журнала (или снимок, если пора уплотнять)"""
+        if first_seq is None:
+            first_seq = self.assign_seq(len(changes))
+        if not self.journal or self._journal_records + len(changes) >= self._compact_threshold:
+            # Снимок уже содержит эти изменения, журнал очищается
+            return self.prepare_save(app_data)
+        
+        text = "".join(
+            json.dumps({"seq": seq, "op": op, "data": data}, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for seq, (op, data) in enumerate(changes, first_seq)
+        )
+        return lambda: self._append_journal(text.encode('utf-8'), len(changes))
+    
+    def _append_journal(self, data: bytes, records: int):
+        """Дописать строки в журнал; при ошибке журнал возвращается к прежнему размеру"""
+        with open(self.journal_path, 'ab', buffering=0) as f:
+            size_before = os.fstat(f.fileno()).st_size
+            try:
+                if f.write(data) != len(data):
+                    raise OSError("журнал записан не полностью")
+            except OSError:
+                # Не оставлять обрывок строки: повторная запись начнется с целой строки
+                f.truncate(size_before)
+                raise
+        self.last_write_bytes = len(data)
+        self._journal_records += records
+    
+    def signature(self) -> tuple:
+        """Отпечаток снимка и журнала"""
+        return (_file_signature(self.saved_data_path), _file_signature(self.journal_path))
+    
+    def _replay_journal(self, app_data: AppData, snapshot_seq: int):
+        """Воспроизвести записи журнала, не вошедшие в снимок
+        
+        Оборванная последняя строка (сбой во время записи) отрезается:
+        иначе следующие записи дописывались бы после обрывка и терялись
+        при каждой загрузке.
+        """
+        self._journal_records = 0
+        if not self.journal_path.exists():
+            return
+        
+        valid_end = 0  # Конец последней целой записи, байт
+        torn = False
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    torn = True
+                    break
+                valid_end += len(line)
+                if record["seq"] <= snapshot_seq:
+                    continue
+                app_data.apply_change(record["op"], record["data"])
+                self.applied_seq = record["seq"]
+                self._journal_records += 1
+        
+        if torn:
+            size = self.journal_path.stat().st_size
+            print(f"Журнал оборван: отрезано {size - valid_end} байт после последней целой записи")
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid_end)
+        elif valid_end and not line.endswith(b"\n"):
+            # Запись цела, но перевод строки не успел записаться
+            with open(self.journal_path, 'ab') as f:
+                f.write(b"\n")
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS storages (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    capacity_kg REAL NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS species (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    best_bait TEXT NOT NULL,
+    price_guide REAL NOT NULL,
+    UNIQUE (name, best_bait, price_guide)
+);
+CREATE TABLE IF NOT EXISTS catches (
+    id TEXT PRIMARY KEY,
+    storage_id INTEGER NOT NULL REFERENCES storages(id),
+    species_id INTEGER NOT NULL REFERENCES species(id),
+    rarity TEXT NOT NULL,
+    weight REAL NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_catches_storage_rarity_weight
+    ON catches (storage_id, rarity, weight);
+CREATE INDEX IF NOT EXISTS idx_catches_timestamp
+    ON catches (timestamp);
+"""
+
+# Постоянное хранилище всегда имеет id 0
+PERMANENT_STORAGE_ID = 0
+
+CATCH_SELECT = """
+SELECT c.id, s.name, c.rarity, c.weight, c.timestamp, s.price_guide, s.best_bait, c.storage_id
+FROM catches c JOIN species s ON s.id = c.species_id
+"""
+
+
+class SqliteBackend(StorageBackend):
+    """Хранилище на SQLite: изменения выполняются построчными запросами"""
+    
+    def __init__(self, db_path: Path, legacy: Optional[StorageBackend] = None):
+        self.db_path = db_path
+        # Источник для однократной миграции (saved_data.json)
+        self.legacy = legacy
+        
+        # Обработчики Flet выполняются в пуле потоков
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.executescript(SQLITE_SCHEMA)
+        
+        self._storage_ids = {}  # {storage_name: storage_id}
+        self._species_ids = {}  # {(name, best_bait, price_guide): species_id}
+    
+    def load(self) -> AppData:
+        """Загрузить данные из базы (при первом запуске импортировать JSON)"""
+        with self._lock:
+            migrated = self.conn.execute(
+                "SELECT value FROM meta WHERE key = 'migrated'"
+            ).fetchone()
+        
+        if migrated is None:
+            if self.legacy is not None:
+                app_data = self.legacy.load()
+            else:
+                app_data = AppData.create_default()
+            self.save(app_data)
+            with self._lock, self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('migrated', '1')")
+            return app_data
+        
+        with self._lock:
+            meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+            storage_rows = self.conn.execute(
+                "SELECT id, name, kind, capacity_kg FROM storages ORDER BY position"
+            ).fetchall()
+            catch_rows = self.conn.execute(CATCH_SELECT + " ORDER BY c.rowid").fetchall()
+            self._load_species_ids()
+        
+        temporary = {}
+        permanent_limit = 100.0
+        self._storage_ids = {}
+        for storage_id, name, kind, capacity_kg in storage_rows:
+            if kind == "permanent":
+                permanent_limit = capacity_kg
+                continue
+            temporary[storage_id] = TemporaryStorage(name=name, limit=capacity_kg, fishes=[])
+            self._storage_ids[name] = storage_id
+        
+        permanent = []
+        for row in catch_rows:
+            fish = self._row_to_fish(row)
+            if row[7] == PERMANENT_STORAGE_ID:
+                permanent.append(fish)
+            elif row[7] in temporary:
+                temporary[row[7]].fishes.append(fish)
+        
+        return AppData(
+            temporary_storages=list(temporary.values()),
+            permanent_storage=permanent,
+            current_storage_name=meta.get("current_storage_name", ""),
+            permanent_storage_limit=permanent_limit
+        )
+    
+    def save(self, app_data: AppData):
+        """Перезаписать базу целиком (миграция и явное сохранение)"""
+        with self._lock, self.conn:
+            self._load_species_ids()
+            self.conn.execute("DELETE FROM catches")
+            self.conn.execute("DELETE FROM storages")
+            self.conn.execute(
+                "INSERT INTO storages VALUES (?, '', 'permanent', ?, -1)",
+                (PERMANENT_STORAGE_ID, app_data.permanent_storage_limit)
+            )
+            self._storage_ids = {}
+            for position, storage in enumerate(app_data.temporary_storages):
+                self._insert_storage(storage.name, storage.limit, position)
+                for fish in storage.fishes:
+                    self._insert_catch(fish, self._storage_ids[storage.name])
+            for fish in app_data.permanent_storage:
+                self._insert_catch(fish, PERMANENT_STORAGE_ID)
+            self._set_meta("current_storage_name", app_data.current_storage_name)
+    
+    def record_many(self, app_data: AppData, changes: list[tuple[str, dict]],
+                    first_seq: Optional[int] = None):
+        """Выполнить пачку изменений в одной транзакции"""
+        with self._lock, self.conn:
+            for op, data in changes:
+                self._execute_change(op, data)
+            
+            # Активное хранилище могло измениться (select/create/update/delete)
+            if any(op.endswith("_storage") for op, _ in changes):
+                self._set_meta("current_storage_name", app_data.current_storage_name)
+    
+    def _execute_change(self, op: str, data: dict):
+        """Выполнить изменение одним-двумя построчными запросами"""
+        if op == "add_fish":
+            storage = data["storage"]
+            storage_id = PERMANENT_STORAGE_ID if storage == PERMANENT else self._storage_ids[storage]
+            self._insert_catch(Fish.from_dict(data["fish"]), storage_id)
+        elif op == "delete_fish":
+            self.conn.execute("DELETE FROM catches WHERE id = ?", (data["fish_id"],))
+        elif op == "transfer":
+            self.conn.execute(
+                "UPDATE catches SET storage_id = ? WHERE storage_id = ?",
+                (PERMANENT_STORAGE_ID, self._storage_ids[data["storage"]])
+            )
+        elif op == "sell":
+            self.conn.execute("DELETE FROM catches WHERE storage_id = ?", (PERMANENT_STORAGE_ID,))
+        elif op == "create_storage":
+            self._insert_storage(data["name"], float(data["limit"]), len(self._storage_ids))
+        elif op == "update_storage":
+            storage_id = self._storage_ids.pop(data["name"])
+            self._storage_ids[data["new_name"]] = storage_id
+            self.conn.execute(
+                "UPDATE storages SET name = ?, capacity_kg = ? WHERE id = ?",
+                (data["new_name"], float(data["limit"]), storage_id)
+            )
+        elif op == "delete_storage":
+            storage_id = self._storage_ids.pop(data["name"])
+            self.conn.execute("DELETE FROM catches WHERE storage_id = ?", (storage_id,))
+            self.conn.execute("DELETE FROM storages WHERE id = ?", (storage_id,))
+        elif op == "set_permanent_limit":
+            self.conn.execute(
+                "UPDATE storages SET capacity_kg = ? WHERE id = ?",
+                (float(data["limit"]), PERMANENT_STORAGE_ID)
+            )
+    
+    def query_catches(self, app_data: AppData, storage: Optional[str] = None,
+                      rarity: Optional[str] = None, min_weight: Optional[float] = None,
+                      since: Optional[int] = None) -> list[Fish]:
+        """Найти рыбы индексированным запросом"""
+        conditions, params = [], []
+        if storage is not None:
+            storage_id = PERMANENT_STORAGE_ID if storage == PERMANENT else self._storage_ids.get(storage)
+            if storage_id is None:
+                return []
+            conditions.append("c.storage_id = ?")
+            params.append(storage_id)
+        if rarity is not None:
+            conditions.append("c.rarity = ?")
+            params.append(rarity)
+        if min_weight is not None:
+            conditions.append("c.weight >= ?")
+            params.append(min_weight)
+        if since is not None:
+            conditions.append("c.timestamp >= ?")
+            params.append(since)
+        
+        sql = CATCH_SELECT
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with self._lock:
+            rows = self.conn.execute(sql + " ORDER BY c.rowid", params).fetchall()
+        return [self._row_to_fish(row) for row in rows]
+    
+    def signature(self) -> tuple:
+        """Отпечаток файла базы"""
+        return (_file_signature(self.db_path),)
+    
+    def close(self):
+        """Закрыть соединение с базой"""
+        with self._lock:
+            self.conn.close()
+    
+    def _row_to_fish(self, row) -> Fish:
+        """Собрать Fish из строки запроса CATCH_SELECT"""
+        fish_id, name, rarity, weight, timestamp, price_guide, best_bait, storage_id = row
+        return Fish.from_dict({
+            "id": fish_id,
+            "name": name,
+            "rarity": rarity,
+            "weight": weight,
+            "timestamp": timestamp,
+            "price_guide": price_guide,
+            "best_bait": best_bait,
+            "storage": "permanent" if storage_id == PERMANENT_STORAGE_ID else "temporary"
+        })
+    
+    def _load_species_ids(self):
+        """Заполнить кеш id видов"""
+        self._species_ids = {
+            (name, best_bait, price_guide): species_id
+            for species_id, name, best_bait, price_guide
+            in self.conn.execute("SELECT id, name, best_bait, price_guide FROM species")
+        }
+    
+    def _species_id(self, fish: Fish) -> int:
+        """Получить id вида рыбы, добавив его при необходимости"""
+        key = (fish.name, fish.best_bait, float(fish.price_guide))
+        species_id = self._species_ids.get(key)
+        if species_id is None:
+            cursor = self.conn.execute(
+                "INSERT INTO species (name, best_bait, price_guide) VALUES (?, ?, ?)", key
+            )
+            species_id = cursor.lastrowid
+            self._species_ids[key] = species_id
+        return species_id
+    
+    def _insert_storage(self, name: str, limit: float, position: int):
+        """Добавить временное хранилище"""
+        cursor = self.conn.execute(
+            "INSERT INTO storages (name, kind, capacity_kg, position) VALUES (?, 'temporary', ?, ?)",
+            (name, limit, position)
+        )
+        self._storage_ids[name] = cursor.lastrowid
+    
+    def _insert_catch(self, fish: Fish, storage_id: int):
+        """Добавить рыбу"""
+        self.conn.execute(
+            "INSERT INTO catches VALUES (?, ?, ?, ?, ?, ?)",
+            (fish.id, storage_id, self._species_id(fish), fish.rarity, fish.weight, fish.timestamp)
+        )
+    
+    def _set_meta(self, key: str, value: str):
+        """Записать значение в таблицу meta"""
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
@@ -0,0 +1,299 @@
+"""
+UI компонент страницы диагностики производительности
+"""
+import flet as ft
+import threading
+import tracemalloc
+from typing import Optional
+import instrumentation
+from models import AppData
+from ui_components.update_scheduler import UpdateScheduler, batched
+
+
+# Период автообновления, секунды
+REFRESH_INTERVAL = 2.0
+
+# Сколько медленных действий и мест выделения памяти показывать
+TOP_N = 5
+
+
+def _children(control: ft.Control) -> list:
+    """Дочерние контролы
+    
+    Control._get_children() - закрытый метод Flet (проверено на 0.28): он
+    знает все слоты контрола (actions, title, destinations...). Если его
+    не станет, обход ограничится публичными controls и content.
+    """
+    get_children = getattr(control, "_get_children", None)
+    if get_children is not None:
+        return get_children()
+    children = list(getattr(control, "controls", None) or [])
+    content = getattr(control, "content", None)
+    if isinstance(content, ft.Control):
+        children.append(content)
+    return children
+
+
+def count_controls(page: ft.Page) -> int:
+    """Число контролов страницы, включая навигацию и overlay (обход без рекурсии)"""
+    stack = list(page.controls) + list(page.overlay)
+    if page.navigation_bar is not None:
+        stack.append(page.navigation_bar)
+    total = 0
+    while stack:
+        control = stack.pop()
+        total += 1
+        stack.extend(child for child in _children(control) if child is not None)
+    return total
+
+
+def _format_bytes(size: Optional[float]) -> str:
+    """Размер в читаемом виде"""
+    if size is None:
+        return "н/д"
+    for unit in ("Б", "КБ", "МБ"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГБ"
+
+
+def _format_ms(seconds: Optional[float]) -> str:
+    """Длительность в миллисекундах"""
+    return "н/д" if seconds is None else f"{seconds * 1000:.1f} мс"
+
+
+class DiagnosticsView:
+    """Виджет страницы диагностики
+    
+    Показывает счетчики, по которым видно, почему интерфейс тормозит
+    на большой истории: размер дерева контролов, число page.update()
+    на действие, объем и длительность записи, память данных и самые
+    долгие обработчики. Память считается через tracemalloc, который
+    main запускает при включенной диагностике.
+    """
+    
+    def __init__(self, page: ft.Page, data_manager, app_data: AppData,
+                 startup: Optional[instrumentation.Phases] = None):
+        self.page = page
+        self.data_manager = data_manager
+        self.app_data = app_data
+        self.startup = startup  # Этапы запуска приложения
+        self.updates = UpdateScheduler.for_page(page)
+        
+        self.content = ft.Ref[ft.Column]()
+        self.auto_refresh = ft.Ref[ft.Switch]()
+        self._timer: Optional[threading.Timer] = None
+        self._visible = False  # Страница показана (автообновление идет только тогда)
+        self._memory_sites: list[str] = []  # Последний снимок мест выделения памяти
+        self._species_cache = (-1, 0)  # (версия данных, число видов)
+    
+    def build(self) -> ft.Container:
+        """Построить главный контейнер страницы"""
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Row(
+                        [
+                            ft.Text("Диагностика", size=28, weight=ft.FontWeight.BOLD),
+                            ft.Row(
+                                [
+                                    ft.Switch(
+                                        ref=self.auto_refresh,
+                                        label=f"Автообновление ({REFRESH_INTERVAL:g} с)",
+                                        value=False,
+                                        on_change=self._on_auto_refresh_changed
+                                    ),
+                                    ft.OutlinedButton(
+                                        "Снимок памяти",
+                                        icon=ft.Icons.MEMORY,
+                                        on_click=self._on_memory_snapshot
+                                    ),
+                                    ft.FilledButton(
+                                        "Обновить",
+                                        icon=ft.Icons.REFRESH,
+                                        on_click=self._on_refresh_click
+                                    )
+                                ],
+                                spacing=10
+                            )
+                        ],
+                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN
+                    ),
+                    ft.Column(ref=self.content, spacing=15)
+                ],
+                spacing=20,
+                scroll=ft.ScrollMode.AUTO,
+                expand=True
+            ),
+            padding=20,
+            expand=True
+        )
+    
+    def _section(self, title: str, rows: list[tuple[str, str]]) -> ft.Container:
+        """Блок «название: значение»"""
+        return ft.Container(
+            content=ft.Column(
+                [ft.Text(title, size=20, weight=ft.FontWeight.BOLD), ft.Divider()]
+                + [
+                    ft.Row(
+                        [
+                            ft.Text(label, size=14, color=ft.Colors.GREY_400, width=320),
+                            ft.Text(value, size=14, weight=ft.FontWeight.W_500, selectable=True)
+                        ]
+                    )
+                    for label, value in rows
+                ],
+                spacing=6
+            ),
+            padding=15,
+            border=ft.border.all(1, ft.Colors.OUTLINE_VARIANT),
+            border_radius=10
+        )
+    
+    def _page_rows(self) -> list[tuple[str, str]]:
+        """Дерево контролов и обновления страницы"""
+        updates = self.updates
+        per_action = updates.updates / updates.actions if updates.actions else 0
+        return [
+            ("Контролов на странице", str(count_controls(self.page))),
+            ("Действий / вызовов page.update()", f"{updates.actions} / {updates.updates}"),
+            ("page.update() на действие (среднее)", f"{per_action:.2f}"),
+            ("page.update() на действие (макс. из последних)", str(updates.max_updates_per_action))
+        ]
+    
+    def _data_rows(self) -> list[tuple[str, str]]:
+        """Объем данных, чтение и запись"""
+        dm = self.data_manager
+        app_data = self.app_data
+        catches = app_data.count_catches()
+        species = self._species_count()
+        
+        # Память данных оценивается по приросту tracemalloc при последней загрузке
+        if dm.last_load_bytes is not None and dm.last_load_catches:
+            footprint = _format_bytes(dm.last_load_bytes / dm.last_load_catches * catches)
+            footprint = "≈ " + footprint
+        elif dm.last_load_bytes is not None:
+            footprint = _format_bytes(dm.last_load_bytes)
+        else:
+            footprint = "н/д (tracemalloc запущен после загрузки)"
+        
+        return [
+            ("Хранилище данных", type(dm.backend).__name__),
+            ("Объектов AppData (рыб / хранилищ / видов)",
+             f"{catches} / {len(app_data.temporary_storages) + 1} / {species}"),
+            ("Память данных (tracemalloc)", footprint),
+            ("Последняя загрузка", _format_ms(dm.last_load_seconds)),
+            ("Последняя запись", _format_ms(dm.last_save_seconds)),
+            ("Байт за последнюю запись", _format_bytes(dm.last_save_bytes)),
+            ("Всего записей / байт", f"{dm.saves} / {_format_bytes(dm.bytes_written)}")
+        ]
+    
+    def _species_count(self) -> int:
+        """Число разных Species в истории (пересчитывается только после изменений)"""
+        version, count = self._species_cache
+        if version != self.data_manager.version:
+            species = {fish.species for s in self.app_data.temporary_storages for fish in s.fishes}
+            species.update(fish.species for fish in self.app_data.permanent_storage)
+            count = len(species)
+            self._species_cache = (self.data_manager.version, count)
+        return count
+    
+    def _startup_rows(self) -> list[tuple[str, str]]:
+        """Этапы запуска до первого кадра"""
+        if self.startup is None:
+            return [("Запуск", "н/д")]
+        rows = [("До первого кадра (всего)", _format_ms(self.startup.total))]
+        rows += [(phase, _format_ms(seconds)) for phase, seconds in self.startup.phases.items()]
+        return rows
+    
+    def _memory_rows(self) -> list[tuple[str, str]]:
+        """Память процесса по tracemalloc"""
+        if not tracemalloc.is_tracing():
+            return [("tracemalloc", "не запущен")]
+        current, peak = tracemalloc.get_traced_memory()
+        rows = [("Выделено сейчас / пик", f"{_format_bytes(current)} / {_format_bytes(peak)}")]
+        rows += [(f"Место выделения #{n}", site) for n, site in enumerate(self._memory_sites, 1)]
+        return rows
+    
+    def _slow_rows(self) -> list[tuple[str, str]]:
+        """Самые долгие недавние действия и интервалы замеров"""
+        rows = [(name or "без названия", _format_ms(seconds)) for name, seconds in self.updates.slowest_actions(TOP_N)]
+        if instrumentation.enabled:
+            spans = instrumentation.registry.snapshot()["spans"]
+            ranked = sorted(spans.items(), key=lambda item: item[1].get("p95_ms", 0), reverse=True)
+            rows += [
+                (f"{name} (p95, {stats['count']} раз)", f"{stats.get('p95_ms', 0):.1f} мс")
+                for name, stats in ranked[:TOP_N]
+            ]
+        return rows or [("Действий еще не было", "")]
+    
+    def refresh(self):
+        """Обновить отображение"""
+        if self.content.current is None:
+            return
+        self.content.current.controls = [
+            self._section("Страница", self._page_rows()),
+            self._section("Данные", self._data_rows()),
+            self._section("Запуск", self._startup_rows()),
+            self._section("Память", self._memory_rows()),
+            self._section("Самые долгие действия", self._slow_rows())
+        ]
+        self.updates.request_update("diagnostics")
+    
+    @batched
+    def _on_refresh_click(self, e):
+        """Обновить по кнопке"""
+        self.refresh()
+    
+    @batched
+    def _on_memory_snapshot(self, e):
+        """Снимок tracemalloc: где выделено больше всего памяти (долго на большой истории)"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        stats = tracemalloc.take_snapshot().statistics("lineno")[:TOP_N]
+        self._memory_sites = [
+            f"{_format_bytes(stat.size)} - {stat.traceback[0].filename}:{stat.traceback[0].lineno}"
+            for stat in stats
+        ]
+        self.refresh()
+    
+    def set_visible(self, visible: bool):
+        """Страницу показали или скрыли: автообновление работает только на виду"""
+        self._visible = visible
+        switch = self.auto_refresh.current
+        if visible and switch is not None and switch.value:
+            self._schedule()
+        else:
+            self._cancel()
+    
+    def _on_auto_refresh_changed(self, e):
+        """Включить или выключить автообновление"""
+        if e.control.value and self._visible:
+            self._schedule()
+        else:
+            self._cancel()
+    
+    def _schedule(self):
+        """Запланировать следующее автообновление"""
+        self._cancel()
+        self._timer = threading.Timer(REFRESH_INTERVAL, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _cancel(self):
+        """Остановить автообновление"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+    
+    def _tick(self):
+        """Автообновление (в потоке таймера)"""
+        switch = self.auto_refresh.current
+        if not self._visible or switch is None or not switch.value:
+            return
+        # Само обновление - не действие пользователя: оно не должно попадать
+        # в счетчики и "самые долгие действия", которые эта страница показывает
+        with self.updates.action("diagnostics", record=False):
+            self.refresh()
+        self._schedule()
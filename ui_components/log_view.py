@@ -2,9 +2,15 @@
 UI компонент для страницы журнала и хранилища
 """
 import flet as ft
+import math
 from datetime import datetime
 from typing import Callable, Optional
-from models import Fish, TemporaryStorage, AppData
+from instrumentation import count, traced
+from models import Fish, TemporaryStorage, AppData, ChangeEvent, PERMANENT
+from search_index import PrefixTrie
+from stats_engine import StatsAccumulator
+from ui_components.update_scheduler import UpdateScheduler, batched
+from ui_components.virtual_list import VirtualList
 
 
 # Цвета редкости
@@ -22,36 +28,47 @@ RARITY_NAMES = {
     "trophy": "Зеленая"
 }
 
+# Сколько подсказок показывать под полем названия
+NAME_SUGGESTIONS = 6
+
 
 class LogView:
     """Виджет страницы журнала"""
     
-    def __init__(self, page: ft.Page, data_manager, app_data: AppData, 
-                 on_data_changed: Callable):
+    def __init__(self, page: ft.Page, data_manager, app_data: AppData, accumulator: StatsAccumulator):
         self.page = page
         self.data_manager = data_manager
         self.app_data = app_data
-        self.on_data_changed = on_data_changed
+        self.accumulator = accumulator  # Частота уловов для порядка подсказок
+        self.updates = UpdateScheduler.for_page(page)
         
         # Состояние формы
         self.selected_rarity = ft.Ref[ft.SegmentedButton]()
         self.fish_name_field = ft.Ref[ft.TextField]()
+        self.name_suggestions = ft.Ref[ft.Row]()  # Подсказки названий под полем
         self.weight_field = ft.Ref[ft.TextField]()
         self.storage_dropdown = ft.Ref[ft.Dropdown]()
-        self.fish_list_view = ft.Ref[ft.ListView]()
+        self.fish_list = VirtualList(
+            lambda fish: self._build_fish_card(fish, self._on_delete_fish),
+            key=lambda fish: fish.id,
+            updates=self.updates
+        )
         self.progress_bar = ft.Ref[ft.ProgressBar]()
         self.progress_text = ft.Ref[ft.Text]()  # Текст заполнения временного хранилища
+        self.fill_warning = ft.Ref[ft.Container]()  # Строка "заполнено на N%" (видна от 95%)
+        self.fill_warning_text = ft.Ref[ft.Text]()
         self.warning_banner = ft.Ref[ft.Banner]()
-        self.permanent_list_view = ft.Ref[ft.ListView]()
+        self.permanent_list = VirtualList(self._build_fish_card, key=lambda fish: fish.id, updates=self.updates)
         self.permanent_progress_bar = ft.Ref[ft.ProgressBar]()  # Прогресс постоянного хранилища
         self.permanent_progress_text = ft.Ref[ft.Text]()  # Текст заполнения постоянного хранилища
+        self._storage_names = []  # Названия хранилищ в опциях селектора
         
         # Флаг для отслеживания показанного предупреждения
         self._last_warning_percentage = {}  # {storage_name: last_shown_percentage}
         
-        # Список рыб из справочника для автодополнения
-        self.fish_reference = data_manager.load_fish_reference()
-        self.fish_names = [f["name"] for f in self.fish_reference.get("рыбы", [])]
+        # Префиксное дерево названий из справочника для автодополнения
+        self._name_trie: Optional[PrefixTrie] = None
+        self._name_trie_version = None
         
     def build(self) -> ft.Container:
         """Построить главный контейнер страницы"""
@@ -173,12 +190,14 @@ class LogView:
                 
                 # Поле названия с автодополнением
                 ft.Text("Название рыбы:", size=14),
-                ft.Dropdown(
+                ft.TextField(
                     ref=self.fish_name_field,
-                    options=[ft.dropdown.Option(name) for name in self.fish_names],
-                    hint_text="Выберите или введите название",
+                    hint_text="Начните вводить название",
+                    on_change=self._on_fish_name_changed,
+                    on_submit=self._on_fish_name_submit,
                     autofocus=False
                 ),
+                ft.Row(ref=self.name_suggestions, wrap=True, spacing=5, run_spacing=5),
                 
                 # Поле веса (в граммах)
                 ft.ResponsiveRow(
@@ -224,11 +243,7 @@ class LogView:
                 [
                     ft.Text("Текущий улов:", size=16, weight=ft.FontWeight.BOLD),
                     ft.Container(
-                        content=ft.ListView(
-                            ref=self.fish_list_view,
-                            spacing=5,
-                            expand=True
-                        ),
+                        content=self.fish_list.build(),
                         border=ft.border.all(1, ft.Colors.OUTLINE_VARIANT),
                         border_radius=5,
                         padding=5,
@@ -250,28 +265,27 @@ class LogView:
         fill_percentage = current_storage.get_fill_percentage()
         is_warning = fill_percentage > 95
         
-        # Показать предупреждение, если заполнено на 95% или больше
-        warning_text = None
-        if fill_percentage >= 95:
-            warning_text = ft.Container(
-                content=ft.Row(
-                    [
-                        ft.Icon(ft.Icons.WARNING, color=ft.Colors.ORANGE, size=16),
-                        ft.Text(
-                            f"Хранилище заполнено на {fill_percentage:.1f}%!",
-                            size=12,
-                            color=ft.Colors.ORANGE,
-                            weight=ft.FontWeight.BOLD
-                        )
-                    ],
-                    spacing=5
-                ),
-                padding=ft.padding.only(bottom=5)
-            )
+        # Предупреждение строится всегда и показывается в refresh(), если заполнено на 95% или больше
+        warning_text = ft.Container(
+            ref=self.fill_warning,
+            content=ft.Row(
+                [
+                    ft.Icon(ft.Icons.WARNING, color=ft.Colors.ORANGE, size=16),
+                    ft.Text(
+                        f"Хранилище заполнено на {fill_percentage:.1f}%!",
+                        ref=self.fill_warning_text,
+                        size=12,
+                        color=ft.Colors.ORANGE,
+                        weight=ft.FontWeight.BOLD
+                    )
+                ],
+                spacing=5
+            ),
+            padding=ft.padding.only(bottom=5),
+            visible=fill_percentage >= 95
+        )
         
-        content_list = []
-        if warning_text:
-            content_list.append(warning_text)
+        content_list = [warning_text]
         
         current_weight_kg = current_storage.get_total_weight_kg()
         content_list.extend([
@@ -355,6 +369,7 @@ class LogView:
     def _build_storage_selector(self) -> ft.Dropdown:
         """Селектор активного хранилища"""
         storage_names = [s.name for s in self.app_data.temporary_storages]
+        self._storage_names = storage_names
         dropdown = ft.Dropdown(
             ref=self.storage_dropdown,
             options=[ft.dropdown.Option(name) for name in storage_names],
@@ -404,11 +419,7 @@ class LogView:
                 ),
                 ft.Divider(),
                 ft.Container(
-                    content=ft.ListView(
-                        ref=self.permanent_list_view,
-                        spacing=5,
-                        expand=True
-                    ),
+                    content=self.permanent_list.build(),
                     border=ft.border.all(1, ft.Colors.OUTLINE_VARIANT),
                     border_radius=5,
                     padding=5,
@@ -429,6 +440,48 @@ class LogView:
             expand=True
         )
     
+    def _get_name_trie(self) -> PrefixTrie:
+        """Дерево названий для текущей версии справочника"""
+        version = self.data_manager.catalog.check_version()
+        if self._name_trie is None or self._name_trie_version != version:
+            self._name_trie = PrefixTrie(self.data_manager.catalog.names())
+            self._name_trie_version = version
+        return self._name_trie
+    
+    def _set_name_suggestions(self, names: list[str]):
+        """Показать подсказки названий"""
+        self.name_suggestions.current.controls = [
+            ft.OutlinedButton(name, on_click=lambda _, n=name: self._on_name_suggestion(n))
+            for name in names
+        ]
+    
+    @batched
+    def _on_fish_name_changed(self, e):
+        """Подобрать названия по введенному началу (сначала - частые уловы)"""
+        query = e.control.value or ""
+        names = []
+        if query.strip():
+            names = self._get_name_trie().complete(
+                query, limit=NAME_SUGGESTIONS, counts=self.accumulator.catch_counts()
+            )
+            if len(names) == 1 and names[0] == query.strip():
+                names = []  # Название уже введено полностью
+        self._set_name_suggestions(names)
+        self.updates.request_update("suggestions")
+    
+    @batched
+    def _on_name_suggestion(self, name: str):
+        """Подставить выбранную подсказку"""
+        self.fish_name_field.current.value = name
+        self._set_name_suggestions([])
+        self.updates.request_update("suggestions")
+    
+    def _on_fish_name_submit(self, e):
+        """Enter в поле названия - взять первую подсказку"""
+        buttons = self.name_suggestions.current.controls
+        if buttons:
+            self._on_name_suggestion(buttons[0].text)
+    
     def _on_fish_name_selected(self, e):
         """Обработчик выбора рыбы из списка"""
         # Автоматически заполнить данные из справочника
@@ -439,9 +492,9 @@ class LogView:
                 # Можно автоматически установить редкость, но не будем менять вес
                 pass
     
+    @batched
     def _on_add_fish(self, e):
         """Добавить рыбу в лог"""
-        print("DEBUG: _on_add_fish вызван!")
         try:
             # Получить выбранную редкость
             rarity = "common"  # Значение по умолчанию
@@ -464,7 +517,7 @@ class LogView:
             # Получить вес
             try:
                 weight = float(self.weight_field.current.value or "0")
-                if weight <= 0:
+                if not math.isfinite(weight) or weight <= 0:  # float() принимает "nan" и "inf"
                     raise ValueError
             except ValueError:
                 self._show_snackbar("Введите корректный вес!", ft.Colors.RED)
@@ -505,31 +558,26 @@ class LogView:
                 )
                 return
             
-            current_storage.fishes.append(fish)
-            
             # Очистить форму
             self.fish_name_field.current.value = ""
             self.weight_field.current.value = ""
+            self._set_name_suggestions([])
             
             # Сохранить и обновить UI
-            print(f"DEBUG: Сохраняю рыбу {fish_name}")
-            self.data_manager.save_app_data(self.app_data)
-            print("DEBUG: Данные сохранены")
-            self.refresh()
-            print("DEBUG: UI обновлен")
-            self.on_data_changed()
-            print("DEBUG: on_data_changed вызван")
+            self.data_manager.commit(
+                self.app_data, "add_fish",
+                storage=current_storage.name, fish=fish.to_dict()
+            )
             self._show_snackbar(f"Рыба '{fish_name}' добавлена!", ft.Colors.GREEN)
-            print("DEBUG: _on_add_fish завершен успешно")
         except Exception as ex:
             print(f"ERROR в _on_add_fish: {ex}")
             import traceback
             traceback.print_exc()
             self._show_snackbar(f"Ошибка при добавлении рыбы: {ex}", ft.Colors.RED)
     
+    @batched
     def _on_edit_storage(self, e):
         """Редактировать текущее хранилище"""
-        print("DEBUG: _on_edit_storage вызван!")
         current_storage = self.app_data.get_current_storage()
         if not current_storage:
             self._show_snackbar("Нет активного хранилища!", ft.Colors.RED)
@@ -550,9 +598,11 @@ class LogView:
             autofocus=True
         )
         
+        @self.updates.batched
         def on_cancel(e):
             self._close_dialog(dialog)
         
+        @self.updates.batched
         def on_confirm(e):
             new_name = name_field.value
             try:
@@ -570,6 +620,7 @@ class LogView:
                     return
                 
                 old_name = current_storage.name
+                target_name = old_name
                 
                 # Обновить данные
                 if new_name and new_name.strip() and new_name.strip() != old_name:
@@ -577,15 +628,13 @@ class LogView:
                     if any(s.name == new_name.strip() for s in self.app_data.temporary_storages if s.name != old_name):
                         self._show_snackbar("Хранилище с таким названием уже существует!", ft.Colors.RED)
                         return
-                    current_storage.name = new_name.strip()
-                    self.app_data.current_storage_name = new_name.strip()
+                    target_name = new_name.strip()
                 
-                current_storage.limit = new_limit
-                
-                self.data_manager.save_app_data(self.app_data)
+                self.data_manager.commit(
+                    self.app_data, "update_storage",
+                    name=old_name, new_name=target_name, limit=new_limit
+                )
                 self._close_dialog(dialog)
-                self.refresh()
-                self.on_data_changed()
                 self._show_snackbar(f"Хранилище обновлено!", ft.Colors.GREEN)
             except ValueError:
                 self._show_snackbar("Введите корректное число для лимита!", ft.Colors.RED)
@@ -609,12 +658,11 @@ class LogView:
             ],
             actions_alignment=ft.MainAxisAlignment.END
         )
-        print("DEBUG: Открываю диалог редактирования...")
         self._open_dialog(dialog)
     
+    @batched
     def _on_delete_storage(self, e):
         """Удалить текущее временное хранилище"""
-        print("DEBUG: _on_delete_storage вызван!")
         current_storage = self.app_data.get_current_storage()
         if not current_storage:
             self._show_snackbar("Нет активного хранилища!", ft.Colors.RED)
@@ -629,23 +677,15 @@ class LogView:
         weight_kg = current_storage.get_total_weight_kg()
         storage_name = current_storage.name
         
+        @self.updates.batched
         def on_cancel(e):
             self._close_dialog(dialog)
         
+        @self.updates.batched
         def on_confirm(e):
-            # Удалить хранилище
-            self.app_data.temporary_storages = [
-                s for s in self.app_data.temporary_storages if s.name != storage_name
-            ]
-            
-            # Переключиться на первое доступное хранилище
-            if self.app_data.temporary_storages:
-                self.app_data.current_storage_name = self.app_data.temporary_storages[0].name
-            
-            self.data_manager.save_app_data(self.app_data)
+            # Удалить хранилище (активным станет первое доступное)
+            self.data_manager.commit(self.app_data, "delete_storage", name=storage_name)
             self._close_dialog(dialog)
-            self.refresh()
-            self.on_data_changed()
             self._show_snackbar(f"Хранилище '{storage_name}' удалено!", ft.Colors.GREEN)
         
         # Предупреждение, если в хранилище есть рыба
@@ -678,45 +718,43 @@ class LogView:
             ],
             actions_alignment=ft.MainAxisAlignment.END
         )
-        print("DEBUG: Открываю диалог удаления...")
         self._open_dialog(dialog)
     
+    @batched
     def _on_storage_changed(self, e):
         """Обработчик смены хранилища"""
-        self.app_data.current_storage_name = e.control.value
-        self.data_manager.save_app_data(self.app_data)
-        self.refresh()
-        self.on_data_changed()
+        self.data_manager.commit(self.app_data, "select_storage", name=e.control.value)
     
     def _open_dialog(self, dialog):
         """Универсальный метод открытия диалога для разных версий Flet"""
+        count("log.dialog_open")
         try:
             # Flet 0.21+ требует добавления в overlay
             if dialog not in self.page.overlay:
                 self.page.overlay.append(dialog)
             dialog.open = True
-            self.page.update()
+            self.updates.request_update("dialog")
         except Exception as ex:
-            print(f"DEBUG: Ошибка при открытии диалога: {ex}")
+            print(f"ERROR при открытии диалога: {ex}")
             # Альтернативный способ
             try:
                 self.page.dialog = dialog
                 dialog.open = True
-                self.page.update()
+                self.updates.request_update("dialog")
             except Exception as ex2:
-                print(f"DEBUG: Альтернативный способ тоже не сработал: {ex2}")
+                print(f"ERROR при открытии диалога через page.dialog: {ex2}")
     
     def _close_dialog(self, dialog):
         """Универсальный метод закрытия диалога"""
         try:
             dialog.open = False
-            self.page.update()
+            self.updates.request_update("dialog")
         except Exception as ex:
-            print(f"DEBUG: Ошибка при закрытии диалога: {ex}")
+            print(f"ERROR при закрытии диалога: {ex}")
     
+    @batched
     def _on_create_storage(self, e):
         """Создать новое хранилище"""
-        print("DEBUG: _on_create_storage вызван!")
         try:
             name_field = ft.TextField(
                 label="Название хранилища", 
@@ -730,9 +768,11 @@ class LogView:
                 hint_text="По умолчанию: 50 кг"
             )
             
+            @self.updates.batched
             def on_cancel(e):
                 self._close_dialog(dialog)
             
+            @self.updates.batched
             def on_confirm(e):
                 name = name_field.value
                 try:
@@ -743,17 +783,11 @@ class LogView:
                     limit = 50.0
                 
                 if name and name.strip():
-                    new_storage = TemporaryStorage(
-                        name=name.strip(),
-                        limit=limit,
-                        fishes=[]
+                    self.data_manager.commit(
+                        self.app_data, "create_storage",
+                        name=name.strip(), limit=limit
                     )
-                    self.app_data.temporary_storages.append(new_storage)
-                    self.app_data.current_storage_name = name.strip()
-                    self.data_manager.save_app_data(self.app_data)
                     self._close_dialog(dialog)
-                    self.refresh()
-                    self.on_data_changed()
                     self._show_snackbar(f"Хранилище '{name.strip()}' создано (лимит: {limit:.1f} кг)", ft.Colors.GREEN)
                 else:
                     self._show_snackbar("Введите название хранилища!", ft.Colors.RED)
@@ -768,18 +802,16 @@ class LogView:
                 ],
                 actions_alignment=ft.MainAxisAlignment.END
             )
-            print("DEBUG: Диалог создан, открываю...")
             self._open_dialog(dialog)
-            print("DEBUG: Диалог открыт")
         except Exception as ex:
             print(f"ERROR в _on_create_storage: {ex}")
             import traceback
             traceback.print_exc()
             self._show_snackbar(f"Ошибка: {ex}", ft.Colors.RED)
     
+    @batched
     def _on_transfer_to_permanent(self, e):
         """Перевести все рыбы в постоянное хранилище"""
-        print("DEBUG: _on_transfer_to_permanent вызван!")
         current_storage = self.app_data.get_current_storage()
         if not current_storage or not current_storage.fishes:
             self._show_snackbar("Нет рыбы для переноса!", ft.Colors.ORANGE)
@@ -798,26 +830,19 @@ class LogView:
             )
             return
         
+        @self.updates.batched
         def on_cancel(e):
             self._close_dialog(dialog)
         
+        @self.updates.batched
         def on_confirm(e):
             # Сохранить данные перед переносом
             fish_count = len(current_storage.fishes)
             weight_kg = current_storage.get_total_weight_kg()
             
-            # Переместить все рыбы
-            for fish in current_storage.fishes:
-                fish.storage = "permanent"
-                self.app_data.permanent_storage.append(fish)
-            
-            # Очистить временное хранилище
-            current_storage.fishes.clear()
-            
-            self.data_manager.save_app_data(self.app_data)
+            # Переместить все рыбы и очистить временное хранилище
+            self.data_manager.commit(self.app_data, "transfer", storage=current_storage.name)
             self._close_dialog(dialog)
-            self.refresh()
-            self.on_data_changed()
             self._show_snackbar(f"Переведено {fish_count} рыб ({weight_kg:.2f} кг) в постоянное хранилище!", ft.Colors.GREEN)
         
         dialog = ft.AlertDialog(
@@ -844,13 +869,11 @@ class LogView:
             ],
             actions_alignment=ft.MainAxisAlignment.END
         )
-        print("DEBUG: Открываю диалог переноса...")
         self._open_dialog(dialog)
     
+    @batched
     def _on_configure_permanent_limit(self, e):
         """Настроить лимит постоянного хранилища"""
-        print("DEBUG: _on_configure_permanent_limit вызван!")
-        
         current_weight_kg = self.app_data.get_permanent_total_weight_kg()
         
         limit_field = ft.TextField(
@@ -861,9 +884,11 @@ class LogView:
             autofocus=True
         )
         
+        @self.updates.batched
         def on_cancel(e):
             self._close_dialog(dialog)
         
+        @self.updates.batched
         def on_confirm(e):
             try:
                 new_limit = float(limit_field.value or "100")
@@ -879,11 +904,8 @@ class LogView:
                     )
                     return
                 
-                self.app_data.permanent_storage_limit = new_limit
-                self.data_manager.save_app_data(self.app_data)
+                self.data_manager.commit(self.app_data, "set_permanent_limit", limit=new_limit)
                 self._close_dialog(dialog)
-                self.refresh()
-                self.on_data_changed()
                 self._show_snackbar(f"Лимит постоянного хранилища: {new_limit:.1f} кг", ft.Colors.GREEN)
             except ValueError:
                 self._show_snackbar("Введите корректное число!", ft.Colors.RED)
@@ -906,12 +928,11 @@ class LogView:
             ],
             actions_alignment=ft.MainAxisAlignment.END
         )
-        print("DEBUG: Открываю диалог настройки постоянного хранилища...")
         self._open_dialog(dialog)
     
+    @batched
     def _on_sell_all(self, e):
         """Продать весь улов"""
-        print("DEBUG: _on_sell_all вызван!")
         if not self.app_data.permanent_storage:
             self._show_snackbar("Нет рыбы для продажи!", ft.Colors.ORANGE)
             return
@@ -919,18 +940,17 @@ class LogView:
         total_weight_kg = self.app_data.get_permanent_total_weight_kg()
         fish_count = len(self.app_data.permanent_storage)
         
+        @self.updates.batched
         def on_cancel(e):
             self._close_dialog(dialog)
         
+        @self.updates.batched
         def on_confirm(e):
             weight_kg = self.app_data.get_permanent_total_weight_kg()
             count = len(self.app_data.permanent_storage)
             
-            self.app_data.permanent_storage.clear()
-            self.data_manager.save_app_data(self.app_data)
+            self.data_manager.commit(self.app_data, "sell")
             self._close_dialog(dialog)
-            self.refresh()
-            self.on_data_changed()
             self._show_snackbar(f"Улов продан! {count} рыб ({weight_kg:.2f} кг)", ft.Colors.GREEN)
         
         dialog = ft.AlertDialog(
@@ -950,7 +970,6 @@ class LogView:
             ],
             actions_alignment=ft.MainAxisAlignment.END
         )
-        print("DEBUG: Открываю диалог продажи...")
         self._open_dialog(dialog)
     
     def _build_fish_card(self, fish: Fish, on_delete: Callable = None) -> ft.Container:
@@ -1006,24 +1025,29 @@ class LogView:
             border=ft.border.all(1, ft.Colors.OUTLINE_VARIANT)
         )
     
-    def _sort_fishes(self, fishes: list[Fish]) -> list[Fish]:
-        """Сортировка рыб: сначала по редкости, затем по весу"""
-        rarity_order = {"trophy": 0, "rare": 1, "uncommon": 2, "common": 3}
-        return sorted(fishes, key=lambda f: (rarity_order.get(f.rarity, 99), -f.weight))
-    
-    def refresh(self):
-        """Обновить отображение"""
+    @traced("log.refresh")
+    def refresh(self, event: Optional[ChangeEvent] = None):
+        """Обновить отображение (event - что изменилось; None - обновить все)"""
         # НЕ устанавливаем selected здесь - это вызывает проблему с сериализацией set
         # Значение будет установлено автоматически при первом взаимодействии пользователя
         # или мы будем использовать значение по умолчанию "common" при чтении
         
-        # Обновить список текущего улова
         current_storage = self.app_data.get_current_storage()
-        if current_storage:
-            sorted_fishes = self._sort_fishes(current_storage.fishes)
-            self.fish_list_view.current.controls = [
-                self._build_fish_card(fish, self._on_delete_fish) for fish in sorted_fishes
-            ]
+        refresh_current = (
+            event is None or event.storages_changed
+            or (current_storage is not None and current_storage.name in event.storages)
+        )
+        refresh_permanent = event is None or PERMANENT in event.storages
+        refresh_selector = event is None or event.storages_changed
+        
+        # Обновить список текущего улова
+        if current_storage and refresh_current:
+            # Карточки создаются только для видимого окна списка; порядок
+            # (по редкости, затем по весу) поддерживается самим списком рыб
+            self.fish_list.set_items(
+                current_storage.fishes.sorted_view(),
+                reset=event is None or event.storages_changed
+            )
             
             # Обновить прогресс-бар временного хранилища
             fill_percentage = current_storage.get_fill_percentage()
@@ -1036,42 +1060,53 @@ class LogView:
             if self.progress_text.current:
                 self.progress_text.current.value = f"Заполнено: {current_weight_kg:.2f} / {current_storage.limit:.1f} кг ({fill_percentage:.1f}%) • {len(current_storage.fishes)} шт"
             
+            # Строка предупреждения под прогресс-баром
+            if self.fill_warning.current:
+                self.fill_warning.current.visible = fill_percentage >= 95
+                self.fill_warning_text.current.value = f"Хранилище заполнено на {fill_percentage:.1f}%!"
+            
             # Показать уведомление при заполнении на 95%
             if fill_percentage >= 95:
                 self._show_storage_warning(current_storage, fill_percentage)
         
         # Обновить список постоянного хранилища
-        sorted_permanent = self._sort_fishes(self.app_data.permanent_storage)
-        self.permanent_list_view.current.controls = [
-            self._build_fish_card(fish) for fish in sorted_permanent
-        ]
-        
-        # Обновить прогресс-бар постоянного хранилища
-        perm_fill_percentage = self.app_data.get_permanent_fill_percentage()
-        perm_weight_kg = self.app_data.get_permanent_total_weight_kg()
-        
-        if self.permanent_progress_bar.current:
-            self.permanent_progress_bar.current.value = min(perm_fill_percentage / 100, 1.0)
-            self.permanent_progress_bar.current.color = ft.Colors.RED if perm_fill_percentage > 95 else ft.Colors.GREEN
-        
-        if self.permanent_progress_text.current:
-            self.permanent_progress_text.current.value = f"Заполнено: {perm_weight_kg:.2f} / {self.app_data.permanent_storage_limit:.1f} кг • {len(self.app_data.permanent_storage)} шт"
+        if refresh_permanent:
+            self.permanent_list.set_items(
+                self.app_data.permanent_storage.sorted_view(),
+                reset=event is None
+            )
+            
+            # Обновить прогресс-бар постоянного хранилища
+            perm_fill_percentage = self.app_data.get_permanent_fill_percentage()
+            perm_weight_kg = self.app_data.get_permanent_total_weight_kg()
+            
+            if self.permanent_progress_bar.current:
+                self.permanent_progress_bar.current.value = min(perm_fill_percentage / 100, 1.0)
+                self.permanent_progress_bar.current.color = ft.Colors.RED if perm_fill_percentage > 95 else ft.Colors.GREEN
+            
+            if self.permanent_progress_text.current:
+                self.permanent_progress_text.current.value = f"Заполнено: {perm_weight_kg:.2f} / {self.app_data.permanent_storage_limit:.1f} кг • {len(self.app_data.permanent_storage)} шт"
         
         # Обновить селектор хранилищ
-        storage_names = [s.name for s in self.app_data.temporary_storages]
-        self.storage_dropdown.current.options = [ft.dropdown.Option(name) for name in storage_names]
-        self.storage_dropdown.current.value = self.app_data.current_storage_name
+        if refresh_selector:
+            storage_names = [s.name for s in self.app_data.temporary_storages]
+            if storage_names != self._storage_names:
+                # Опции пересоздаются только при изменении списка хранилищ
+                self.storage_dropdown.current.options = [ft.dropdown.Option(name) for name in storage_names]
+                self._storage_names = storage_names
+            self.storage_dropdown.current.value = self.app_data.current_storage_name
         
-        self.page.update()
+        self.updates.request_update("log")
     
+    @batched
     def _on_delete_fish(self, fish: Fish):
         """Удалить рыбу из временного хранилища"""
         current_storage = self.app_data.get_current_storage()
         if current_storage:
-            current_storage.fishes = [f for f in current_storage.fishes if f.id != fish.id]
-            self.data_manager.save_app_data(self.app_data)
-            self.refresh()
-            self.on_data_changed()
+            self.data_manager.commit(
+                self.app_data, "delete_fish",
+                storage=current_storage.name, fish_id=fish.id
+            )
             self._show_snackbar(f"Рыба '{fish.name}' удалена", ft.Colors.ORANGE)
     
     def _show_storage_warning(self, storage: TemporaryStorage, fill_percentage: float):
@@ -1091,4 +1126,4 @@ class LogView:
             bgcolor=color
         )
         self.page.snack_bar.open = True
-        self.page.update()
+        self.updates.request_update("snackbar")
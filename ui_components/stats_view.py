@@ -2,8 +2,10 @@
 UI компонент для страницы статистики
 """
 import flet as ft
-from models import AppData, Fish
-from collections import Counter
+from instrumentation import traced
+from models import AppData
+from stats_engine import PERCENTILES, StatsAccumulator
+from ui_components.update_scheduler import UpdateScheduler
 
 
 # Цвета редкости
@@ -25,10 +27,12 @@ RARITY_NAMES = {
 class StatsView:
     """Виджет страницы статистики"""
     
-    def __init__(self, page: ft.Page, data_manager, app_data: AppData):
+    def __init__(self, page: ft.Page, data_manager, app_data: AppData, accumulator: StatsAccumulator):
         self.page = page
         self.data_manager = data_manager
         self.app_data = app_data
+        self.updates = UpdateScheduler.for_page(page)
+        self.accumulator = accumulator  # Поддерживается по событиям DataManager
         
         self.stats_container = ft.Ref[ft.Container]()
     
@@ -52,56 +56,11 @@ class StatsView:
             expand=True
         )
     
+    @traced("stats.calculate")
     def _calculate_stats(self) -> dict:
         """Вычислить статистику"""
-        # Собрать все рыбы из всех хранилищ
-        all_fishes = []
-        
-        # Из временных хранилищ
-        for storage in self.app_data.temporary_storages:
-            all_fishes.extend(storage.fishes)
-        
-        # Из постоянного хранилища
-        all_fishes.extend(self.app_data.permanent_storage)
-        
-        if not all_fishes:
-            return {
-                "total": 0,
-                "total_weight_kg": 0,
-                "most_common": None,
-                "max_weight": None,
-                "rarity_distribution": {},
-                "top_fishes": []
-            }
-        
-        # Общее количество
-        total = len(all_fishes)
-        
-        # Общий вес (граммы → кг)
-        total_weight_kg = sum(f.weight for f in all_fishes) / 1000
-        
-        # Самый частый улов
-        name_counter = Counter(f.name for f in all_fishes)
-        most_common = name_counter.most_common(1)[0] if name_counter else None
-        
-        # Рекордный вес (в граммах)
-        max_weight_fish = max(all_fishes, key=lambda f: f.weight) if all_fishes else None
-        
-        # Распределение по редкости
-        rarity_counter = Counter(f.rarity for f in all_fishes)
-        rarity_distribution = dict(rarity_counter)
-        
-        # Топ-5 самых частых рыб
-        top_fishes = name_counter.most_common(5)
-        
-        return {
-            "total": total,
-            "total_weight_kg": total_weight_kg,
-            "most_common": most_common,
-            "max_weight": max_weight_fish,
-            "rarity_distribution": rarity_distribution,
-            "top_fishes": top_fishes
-        }
+        # Показатели уже посчитаны по событиям изменения данных
+        return self.accumulator.stats()
     
     def _build_stats_display(self) -> ft.Column:
         """Построить отображение статистики"""
@@ -120,7 +79,8 @@ class StatsView:
                                 ft.Column(
                                     [
                                         ft.Text("Всего поймано:", size=14, color=ft.Colors.GREY_400),
-                                        ft.Text(f"{stats['total']} шт • {stats['total_weight_kg']:.2f} кг", size=24, weight=ft.FontWeight.BOLD)
+                                        ft.Text(f"{stats['total']} шт • {stats['total_weight_kg']:.2f} кг", size=24, weight=ft.FontWeight.BOLD),
+                                        ft.Text(f"Ориентировочная стоимость: {stats['total_value']:.0f}", size=14, color=ft.Colors.GREY_400)
                                     ],
                                     spacing=5
                                 )
@@ -246,6 +206,22 @@ class StatsView:
                 border_radius=10,
                 bgcolor=ft.Colors.SURFACE,
                 border=ft.border.all(1, ft.Colors.OUTLINE_VARIANT)
+            ),
+            
+            # Вес и стоимость по видам
+            ft.Container(
+                content=ft.Column(
+                    [
+                        ft.Text("Статистика по видам", size=20, weight=ft.FontWeight.BOLD),
+                        ft.Divider(),
+                        self._build_species_table(stats["species_stats"])
+                    ],
+                    spacing=10
+                ),
+                padding=15,
+                border_radius=10,
+                bgcolor=ft.Colors.SURFACE,
+                border=ft.border.all(1, ft.Colors.OUTLINE_VARIANT)
             )
         ]
         
@@ -288,6 +264,34 @@ class StatsView:
         
         return ft.Column(items, spacing=2)
     
+    def _build_species_table(self, species_stats: list) -> ft.Control:
+        """Построить таблицу веса и стоимости по видам"""
+        if not species_stats:
+            return ft.Column([ft.Text("Нет данных", color=ft.Colors.GREY_400)])
+        
+        columns = ["Рыба", "Шт.", "Средний, г", "Мин, г", "Макс, г"]
+        columns += [f"P{p}, г" for p in PERCENTILES]
+        columns.append("Стоимость")
+        
+        rows = []
+        for item in species_stats:
+            cells = [item["name"], str(item["count"])]
+            cells += [f"{item[key]:.0f}" for key in ("mean", "min", "max")]
+            cells += [f"{item['percentiles'][p]:.0f}" for p in PERCENTILES]
+            cells.append(f"{item['value']:.0f}")
+            rows.append(ft.DataRow(cells=[ft.DataCell(ft.Text(c, size=13)) for c in cells]))
+        
+        return ft.Row(
+            [
+                ft.DataTable(
+                    columns=[ft.DataColumn(ft.Text(c, size=13, weight=ft.FontWeight.BOLD)) for c in columns],
+                    rows=rows,
+                    column_spacing=20
+                )
+            ],
+            scroll=ft.ScrollMode.AUTO
+        )
+    
     def _build_top_fishes_chart(self, top_fishes: list) -> ft.Column:
         """Построить график топ-5 рыб"""
         if not top_fishes:
@@ -515,7 +519,7 @@ class StatsView:
         """Обновить отображение"""
         # Обновить статистику
         self.stats_container.current.content = self._build_stats_display()
-        self.page.update()
+        self.updates.request_update("stats")
     
     def _show_snackbar(self, message: str, color: str = ft.Colors.BLUE):
         """Показать уведомление"""
@@ -524,4 +528,4 @@ class StatsView:
             bgcolor=color
         )
         self.page.snack_bar.open = True
-        self.page.update()
+        self.updates.request_update("snackbar")
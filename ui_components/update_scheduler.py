@@ -0,0 +1,146 @@
+"""
+Планировщик обновлений страницы: одно page.update() на действие пользователя
+"""
+import flet as ft
+import functools
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+import instrumentation
+from profiling import profiler
+
+
+class UpdateScheduler:
+    """Объединяет запросы на обновление страницы внутри одного действия
+    
+    Обработчики вызывают request_update() вместо page.update() и
+    отмечают, какая часть страницы изменилась. Внутри action() запросы
+    только накапливаются, а по выходу из внешнего action() выполняется
+    ровно один page.update(). Вне действия запрос выполняется сразу.
+    """
+    
+    _schedulers = weakref.WeakKeyDictionary()  # {page: UpdateScheduler}
+    
+    def __init__(self, page: ft.Page):
+        self.page = page
+        self._local = threading.local()  # Действие свое у каждого потока обработчиков
+        self._lock = threading.Lock()
+        
+        # Счетчики для проверки: сколько page.update() пришлось на действие
+        self.actions = 0
+        self.updates = 0
+        self.history = deque(maxlen=100)  # (действие, обновлений, отмеченные области, секунд)
+        
+        # Считать все вызовы page.update(), в том числе в обход планировщика
+        page_update = page.update
+        
+        def counted_update(*controls):
+            self._count_update()
+            with instrumentation.span("page.update"):
+                return page_update(*controls)
+        
+        page.update = counted_update
+    
+    @classmethod
+    def for_page(cls, page: ft.Page) -> "UpdateScheduler":
+        """Общий планировщик для всех представлений страницы"""
+        scheduler = cls._schedulers.get(page)
+        if scheduler is None:
+            scheduler = cls._schedulers[page] = cls(page)
+        return scheduler
+    
+    @contextmanager
+    def action(self, name: str = "", qualname: str = "", record: bool = True):
+        """Действие пользователя: обновления внутри объединяются в одно
+        
+        qualname - полное имя обработчика, по которому его выбирает
+        профилировщик (по умолчанию name). record=False - фоновое
+        обновление: оно не попадает в счетчики, историю и профиль.
+        """
+        state = self._local
+        depth = getattr(state, "depth", 0)
+        profile = None
+        if depth == 0:
+            state.name = name
+            state.record = record
+            state.dirty = set()
+            state.updates = 0
+            state.started = time.perf_counter()
+            if record and profiler.armed:
+                profile = profiler.start(qualname or name)
+        state.depth = depth + 1
+        try:
+            yield self
+        finally:
+            try:
+                if state.depth == 1:
+                    self._finish_action()
+            finally:
+                state.depth -= 1
+                profiler.stop(profile, qualname or name)
+    
+    def batched(self, handler: Callable) -> Callable:
+        """Обернуть обработчик события в action()"""
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            with self.action(handler.__name__, handler.__qualname__):
+                return handler(*args, **kwargs)
+        return wrapper
+    
+    def request_update(self, region: str = "page"):
+        """Отметить изменившуюся часть страницы"""
+        state = self._local
+        if getattr(state, "depth", 0) > 0:
+            state.dirty.add(region)
+            return
+        # Вне действия - отдельное действие из одного обновления
+        with self.action(region):
+            state.dirty.add(region)
+    
+    def _count_update(self):
+        """Учесть вызов page.update()"""
+        state = self._local
+        if getattr(state, "depth", 0) > 0:
+            state.updates += 1
+            return
+        with self._lock:
+            self.updates += 1
+    
+    def _finish_action(self):
+        """Выполнить накопленное обновление"""
+        state = self._local
+        if state.dirty:
+            self.page.update()
+        if not state.record:
+            return
+        # Длительность действия вместе с обновлением страницы
+        duration = time.perf_counter() - state.started
+        with self._lock:
+            self.actions += 1
+            self.updates += state.updates
+            self.history.append((state.name, state.updates, frozenset(state.dirty), duration))
+        if instrumentation.enabled:
+            instrumentation.record("action." + state.name, duration)
+            instrumentation.count(f"page.updates_per_action.{state.updates}")
+    
+    @property
+    def max_updates_per_action(self) -> int:
+        """Наибольшее число page.update() за одно действие из истории"""
+        return max((updates for _, updates, _, _ in self.history), default=0)
+    
+    def slowest_actions(self, n: int = 5) -> list[tuple[str, float]]:
+        """Самые долгие действия из истории: (действие, секунд)"""
+        ranked = sorted(self.history, key=lambda entry: entry[3], reverse=True)
+        return [(name, duration) for name, _, _, duration in ranked[:n]]
+
+
+def batched(method: Callable) -> Callable:
+    """Декоратор обработчиков представлений (использует self.updates)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.updates.action(method.__name__, method.__qualname__):
+            return method(self, *args, **kwargs)
+    return wrapper
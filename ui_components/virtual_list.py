@@ -0,0 +1,123 @@
+"""
+Виртуализированный список: элементы создаются только для видимого окна
+"""
+import flet as ft
+from contextlib import nullcontext
+from typing import Any, Callable, Hashable, Optional, Sequence
+from ui_components.update_scheduler import UpdateScheduler
+
+
+class VirtualList:
+    """ListView, который создает элементы страницами по мере прокрутки
+    
+    Сначала показывается первая страница и небольшой запас (overscan);
+    следующая страница добавляется, когда до конца списка остается
+    меньше одного экрана. Стоимость обновления зависит от размера окна,
+    а не от числа элементов.
+    
+    Если задан key, созданные элементы кэшируются по ключу: при
+    обновлении неизменившиеся элементы переиспользуются, и Flet
+    отправляет клиенту только вставки, удаления и перемещения.
+    """
+    
+    def __init__(self, build_item: Callable[[Any], ft.Control], page_size: int = 30,
+                 overscan: int = 10, spacing: int = 5,
+                 key: Optional[Callable[[Any], Hashable]] = None,
+                 updates: Optional[UpdateScheduler] = None):
+        self.build_item = build_item
+        self.key = key
+        self.updates = updates  # Подгрузка при прокрутке - отдельное действие планировщика
+        self.page_size = page_size
+        self.overscan = overscan
+        self.spacing = spacing
+        
+        self.list_view: Optional[ft.ListView] = None
+        self._items: Sequence = []
+        self._shown = 0  # Сколько элементов создано
+        self._cache: dict[Hashable, tuple[Any, ft.Control]] = {}  # {ключ: (элемент, control)}
+        self._more_button: Optional[ft.TextButton] = None
+    
+    @property
+    def initial_window(self) -> int:
+        """Размер окна до начала прокрутки"""
+        return self.page_size + self.overscan
+    
+    def build(self) -> ft.ListView:
+        """Создать ListView (вызывается при каждом построении страницы)"""
+        self.list_view = ft.ListView(
+            spacing=self.spacing,
+            expand=True,
+            on_scroll=self._on_scroll,
+            on_scroll_interval=100
+        )
+        self._more_button = ft.TextButton(
+            icon=ft.Icons.EXPAND_MORE,
+            on_click=lambda _: self.load_more()
+        )
+        self._shown = min(len(self._items), self.initial_window)
+        self._render()
+        return self.list_view
+    
+    def set_items(self, items: Sequence, reset: bool = False):
+        """Заменить элементы; reset - вернуть окно к первой странице"""
+        self._items = items
+        window = self.initial_window if reset else max(self._shown, self.initial_window)
+        self._shown = min(len(items), window)
+        self._render()
+    
+    def _control_for(self, item, cache: dict) -> ft.Control:
+        """Элемент из кэша, если он не изменился, иначе новый"""
+        if self.key is None:
+            return self.build_item(item)
+        key = self.key(item)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == item:
+            control = cached[1]
+        else:
+            control = self.build_item(item)
+        cache[key] = (item, control)
+        return control
+    
+    def _render(self):
+        """Собрать элементы окна, переиспользуя закэшированные"""
+        if self.list_view is None:
+            return
+        # В кэше остаются только элементы текущего окна
+        cache = {}
+        controls = [self._control_for(item, cache) for item in self._items[:self._shown]]
+        self._cache = cache
+        self._add_more_button(controls)
+        self.list_view.controls = controls
+    
+    def _add_more_button(self, controls: list):
+        """Кнопка подгрузки - на случай, если прокрутить список нельзя"""
+        remaining = len(self._items) - self._shown
+        if remaining > 0:
+            self._more_button.text = f"Показать еще ({remaining} шт)"
+            controls.append(self._more_button)
+    
+    def load_more(self):
+        """Добавить следующую страницу элементов"""
+        if self.list_view is None or self._shown >= len(self._items):
+            return
+        with self.updates.action("load_more") if self.updates is not None else nullcontext():
+            start = self._shown
+            self._shown = min(len(self._items), start + self.page_size)
+            
+            controls = self.list_view.controls
+            if controls and controls[-1] is self._more_button:
+                controls.pop()
+            controls.extend(self._control_for(item, self._cache) for item in self._items[start:self._shown])
+            self._add_more_button(controls)
+            if self.updates is not None:
+                self.updates.request_update("list")
+            else:
+                self.list_view.update()
+    
+    def _on_scroll(self, e: ft.OnScrollEvent):
+        """Подгрузить страницу, когда до конца остается меньше экрана"""
+        if e.max_scroll_extent is None or e.pixels is None:
+            return
+        viewport = e.viewport_dimension or 0
+        if e.pixels >= e.max_scroll_extent - viewport:
+            self.load_more()
@@ -2,7 +2,11 @@
 UI компонент для страницы справочника рыб
 """
 import flet as ft
-from typing import Callable
+import threading
+from typing import Optional
+from instrumentation import traced
+from search_index import SearchIndex
+from ui_components.update_scheduler import UpdateScheduler
 
 
 # Цвета редкости
@@ -20,6 +24,9 @@ RARITY_NAMES = {
     "trophy": "Зеленая"
 }
 
+# Пауза после последнего нажатия клавиши перед поиском (секунды)
+SEARCH_DEBOUNCE = 0.25
+
 
 class WikiView:
     """Виджет страницы справочника рыб"""
@@ -28,12 +35,23 @@ class WikiView:
         self.page = page
         self.data_manager = data_manager
         self.app_data = app_data
+        self.updates = UpdateScheduler.for_page(page)
         
         self.search_field = ft.Ref[ft.TextField]()
         self.fish_list_view = ft.Ref[ft.ListView]()
         
-        self.fish_reference = data_manager.load_fish_reference()
-        self.filtered_fishes = self.fish_reference.get("рыбы", [])
+        self.catalog = data_manager.catalog
+        self.filtered_fishes = self.catalog.fishes
+        
+        # Индекс строится один раз на версию справочника
+        self._index: Optional[SearchIndex] = None
+        self._index_version = None
+        self._cards: dict[tuple[str, int], ft.Control] = {}  # {(название, версия справочника): карточка}
+        
+        # Отложенный поиск: серия нажатий дает один поиск и одну отрисовку
+        self._search_lock = threading.Lock()
+        self._search_timer: Optional[threading.Timer] = None
+        self._search_seq = 0  # Номер последнего запроса
     
     def build(self) -> ft.Container:
         """Построить главный контейнер страницы"""
@@ -130,31 +148,62 @@ class WikiView:
             border_radius=5
         )
     
+    def _get_index(self) -> SearchIndex:
+        """Индекс поиска для текущей версии справочника"""
+        version = self.catalog.check_version()
+        if self._index is None or self._index_version != version:
+            self._index = self.catalog.search_index()
+            self._index_version = version
+            self._cards = {}  # Карточки прошлой версии справочника больше не нужны
+        return self._index
+    
     def _on_search(self, e):
         """Обработчик поиска по названию рыбы или наживке"""
-        search_term = e.control.value.lower() if e.control.value else ""
-        all_fishes = self.fish_reference.get("рыбы", [])
-        
-        if search_term:
-            self.filtered_fishes = [
-                f for f in all_fishes 
-                if search_term in f.get("name", "").lower() or 
-                   search_term in f.get("best_bait", "").lower()
-            ]
-        else:
-            self.filtered_fishes = all_fishes
-        
-        self._refresh_fish_list()
+        query = e.control.value or ""
+        with self._search_lock:
+            # Поиск выполнится, только когда пользователь перестанет печатать
+            if self._search_timer is not None:
+                self._search_timer.cancel()
+            self._search_seq += 1
+            self._search_timer = threading.Timer(
+                SEARCH_DEBOUNCE, self._run_search, args=(query, self._search_seq)
+            )
+            self._search_timer.daemon = True
+            self._search_timer.start()
+    
+    @traced("wiki.search")
+    def _run_search(self, query: str, seq: int):
+        """Выполнить отложенный поиск (в потоке таймера)"""
+        with self.updates.action("search"):
+            with self._search_lock:
+                if seq != self._search_seq:
+                    return  # Уже введен новый запрос
+                self.filtered_fishes = self._get_index().search(query)
+            self._refresh_fish_list()
+    
+    def _get_card(self, fish_data: dict) -> ft.Control:
+        """Карточка рыбы (строится один раз на версию справочника)"""
+        key = (fish_data["name"], self._index_version)
+        card = self._cards.get(key)
+        if card is None:
+            card = self._cards[key] = self._build_fish_card(fish_data)
+        return card
     
     def _refresh_fish_list(self):
         """Обновить список рыб"""
+        # Фильтр только переставляет готовые карточки - Flet отправит лишь вставки и удаления
         self.fish_list_view.current.controls = [
-            self._build_fish_card(fish) for fish in self.filtered_fishes
+            self._get_card(fish) for fish in self.filtered_fishes
         ]
-        self.page.update()
+        self.updates.request_update("wiki")
     
     def refresh(self):
         """Обновить отображение"""
+        # Справочник мог быть перечитан после изменения fish_data.json
+        search_field = self.search_field.current
+        query = search_field.value if search_field and search_field.value else ""
+        with self._search_lock:
+            self.filtered_fishes = self._get_index().search(query)
         self._refresh_fish_list()
     
     def _show_snackbar(self, message: str, color: str = ft.Colors.BLUE):
@@ -164,4 +213,4 @@ class WikiView:
             bgcolor=color
         )
         self.page.snack_bar.open = True
-        self.page.update()
+        self.updates.request_update("snackbar")
@@ -0,0 +1,129 @@
+"""
+Фоновая (отложенная) запись данных на диск
+"""
+import threading
+import time
+import traceback
+from typing import Callable, Optional
+
+# Наибольшая пауза между повторами неудавшейся записи, секунды
+RETRY_MAX_DELAY = 5.0
+
+
+class WriteBehindSaver:
+    """Фоновый поток, объединяющий изменения за короткое окно в одну запись
+    
+    Пачка, которую не удалось записать, возвращается в начало очереди и
+    записывается повторно с нарастающей паузой; on_error узнает о каждой
+    неудачной попытке.
+    """
+    
+    def __init__(self, write: Callable[[list], None], delay: float = 0.2,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self._write = write  # Получает список всех накопленных элементов
+        self.delay = delay  # Окно объединения в секундах
+        self.on_error = on_error
+        
+        self._cond = threading.Condition()
+        self._pending = []
+        self._busy = False  # Идет запись
+        self._flush_requested = False
+        self._closed = False
+        self._attempts = 0  # Завершенных попыток записи
+        self.failures = 0  # Неудачных попыток подряд
+        self.last_error = None
+        
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+    
+    @property
+    def idle(self) -> bool:
+        """Нет ни ожидающих, ни выполняемых записей"""
+        with self._cond:
+            return not (self._pending or self._busy)
+    
+    def submit(self, item):
+        """Поставить элемент в очередь на запись"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindSaver закрыт")
+            self._pending.append(item)
+            self._cond.notify_all()
+    
+    def flush(self):
+        """Записать все накопленное и дождаться окончания записи
+        
+        Если запись не удалась, возвращается после очередной попытки,
+        не дожидаясь успеха (ошибка - в last_error).
+        """
+        if threading.current_thread() is self._thread:
+            return
+        with self._cond:
+            attempts = self._attempts
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._busy or (self._pending and (self.last_error is None or self._attempts == attempts)):
+                self._cond.wait()
+            self._flush_requested = False
+    
+    def close(self):
+        """Записать все накопленное и остановить поток"""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+    
+    def _retry_delay(self) -> float:
+        """Пауза перед повторной записью после неудач подряд"""
+        return min(RETRY_MAX_DELAY, self.delay * 2 ** self.failures)
+    
+    def _run(self):
+        """Основной цикл фонового потока"""
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                
+                # Подождать еще изменений, чтобы записать их одним разом
+                # (после неудачи - паузу перед повтором)
+                deadline = time.monotonic() + (self._retry_delay() if self.failures else self.delay)
+                while not (self._flush_requested or self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                
+                batch = self._pending
+                self._pending = []
+                self._busy = True
+            
+            error = None
+            try:
+                self._write(batch)
+            except Exception as ex:
+                error = ex
+                print(f"ERROR при фоновой записи данных: {ex}")
+                traceback.print_exc()
+            
+            with self._cond:
+                self._busy = False
+                self._attempts += 1
+                self.last_error = error
+                if error is None:
+                    self.failures = 0
+                elif self._closed:
+                    print(f"ERROR: при закрытии не записано изменений: {len(batch)}")
+                else:
+                    # Повторить пачку раньше изменений, пришедших после нее
+                    self.failures += 1
+                    self._pending[:0] = batch
+                self._cond.notify_all()
+            
+            if error is not None and self.on_error is not None:
+                try:
+                    self.on_error(error)
+                except Exception as ex:
+                    print(f"ERROR в обработчике ошибки записи: {ex}")